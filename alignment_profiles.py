@@ -0,0 +1,179 @@
+import numpy as np
+from ezdxf.document import Drawing
+from ezdxf.filemanagement import readfile
+from typing import Callable, List, NamedTuple, Optional, Sequence, Tuple
+
+from coordinates import CoordinateArrays
+from create_profiles import ProfileArrays, add_profil
+from point_labels import LABEL_TEXT
+
+PROJECTION_CHUNK = 50_000  # tyle punktów rzutujemy naraz - tablice par punkt-odcinek mieszczą się w pamięci podręcznej
+
+
+class AlignmentProjection(NamedTuple):
+    chainage: np.ndarray    # pikietaż rzutu punktu na oś
+    offset: np.ndarray      # odległość od osi, dodatnia po lewej stronie
+    segment: np.ndarray     # indeks odcinka osi, -1 gdy punkt poza korytarzem
+
+
+class StationProfile(NamedTuple):
+    chainage: float         # pikietaż przekroju
+    indices: np.ndarray     # indeksy punktów przekroju, posortowane po offset
+    offset: np.ndarray
+    z: np.ndarray
+
+
+def read_alignment(dxf_path: str, layer: Optional[str] = None) -> np.ndarray:
+    # Pierwsza LWPOLYLINE z pliku (opcjonalnie z danej warstwy) jako oś
+    query = 'LWPOLYLINE' if layer is None else f'LWPOLYLINE[layer=="{layer}"]'
+    for polyline in readfile(dxf_path).modelspace().query(query):
+        return np.array([(x, y) for x, y in polyline.vertices()], dtype=np.float64)
+    raise ValueError(f"Brak polilinii osi w pliku {dxf_path}")
+
+
+def project_onto_alignment(xs: np.ndarray, ys: np.ndarray, alignment: Sequence[Tuple[float, float]],
+                           corridor_width: float) -> AlignmentProjection:
+    alignment = np.asarray(alignment, dtype=np.float64)
+    if len(alignment) < 2:
+        raise ValueError("Oś musi mieć co najmniej dwa wierzchołki")
+    if corridor_width <= 0:
+        raise ValueError("Szerokość korytarza musi być dodatnia")
+    half_width = corridor_width / 2
+
+    start_x, start_y = alignment[:-1, 0], alignment[:-1, 1]
+    dir_x, dir_y = np.diff(alignment[:, 0]), np.diff(alignment[:, 1])
+    lengths = np.hypot(dir_x, dir_y)
+    lengths[lengths == 0] = np.finfo(float).tiny
+    unit_x, unit_y = dir_x / lengths, dir_y / lengths
+    start_chainage = np.concatenate(([0.0], np.cumsum(lengths)[:-1]))
+    n_segments = len(lengths)
+
+    # Indeks odcinków: oczka siatki o boku half_width, do których odcinek może mieć punkty w korytarzu.
+    # Odcinek próbkujemy co pół oczka i dopisujemy do oczek 3x3 wokół każdej próbki.
+    cell = half_width
+    samples_per_segment = np.maximum(np.ceil(lengths / (cell / 2)).astype(np.int64), 1) + 1
+    seg_of_sample = np.repeat(np.arange(n_segments), samples_per_segment)
+    first_sample = np.concatenate(([0], np.cumsum(samples_per_segment)[:-1]))
+    t = (np.arange(len(seg_of_sample)) - first_sample[seg_of_sample]) / (samples_per_segment - 1)[seg_of_sample]
+    sample_x = start_x[seg_of_sample] + t * dir_x[seg_of_sample]
+    sample_y = start_y[seg_of_sample] + t * dir_y[seg_of_sample]
+
+    origin_x, origin_y = alignment[:, 0].min() - 2 * cell, alignment[:, 1].min() - 2 * cell
+    sample_cx = np.floor((sample_x - origin_x) / cell).astype(np.int64)
+    sample_cy = np.floor((sample_y - origin_y) / cell).astype(np.int64)
+    n_rows = int(sample_cy.max()) + 3
+    around = np.array([dx * n_rows + dy for dx in (-1, 0, 1) for dy in (-1, 0, 1)])
+    keys = ((sample_cx * n_rows + sample_cy)[:, None] + around).ravel()
+    pairs = np.unique(keys * n_segments + np.repeat(seg_of_sample, len(around)))
+    cell_keys, cell_segments = np.divmod(pairs, n_segments)
+
+    n = len(xs)
+    chainage = np.full(n, np.nan)
+    offset = np.full(n, np.nan)
+    segment = np.full(n, -1, dtype=np.int64)
+
+    for lo in range(0, n, PROJECTION_CHUNK):
+        px = np.asarray(xs[lo:lo + PROJECTION_CHUNK], dtype=np.float64)
+        py = np.asarray(ys[lo:lo + PROJECTION_CHUNK], dtype=np.float64)
+        cx = np.floor((px - origin_x) / cell).astype(np.int64)
+        cy = np.floor((py - origin_y) / cell).astype(np.int64)
+        inside = (cx >= 0) & (cy >= 0) & (cy < n_rows)
+        point_keys = np.where(inside, cx * n_rows + cy, -1)
+
+        # Pary (punkt, odcinek-kandydat) przez złączenie po kluczu oczka; pary jednego punktu leżą obok siebie
+        first = np.searchsorted(cell_keys, point_keys, side='left')
+        counts = np.searchsorted(cell_keys, point_keys, side='right') - first
+        has_pairs = counts > 0
+        if not has_pairs.any():
+            continue
+        group_start = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        point_idx = np.repeat(np.arange(len(px)), counts)
+        seg = cell_segments[np.repeat(first - group_start, counts) + np.arange(len(point_idx))]
+
+        # Rzut punktu na odcinek; porównujemy kwadraty odległości
+        rel_x = px[point_idx] - start_x[seg]
+        rel_y = py[point_idx] - start_y[seg]
+        ux, uy = unit_x[seg], unit_y[seg]
+        along = rel_x * ux
+        along += rel_y * uy
+        np.clip(along, 0, lengths[seg], out=along)
+        distance = np.square(rel_x - along * ux)
+        distance += np.square(rel_y - along * uy)
+
+        # Dla każdego punktu pierwszy odcinek o najmniejszej odległości
+        starts_with_pairs = group_start[has_pairs]
+        nearest = np.minimum.reduceat(distance, starts_with_pairs)
+        candidates = np.flatnonzero(distance == np.repeat(nearest, counts[has_pairs]))
+        best = candidates[np.concatenate(([True], point_idx[candidates][1:] != point_idx[candidates][:-1]))]
+        best = best[distance[best] <= half_width * half_width]
+
+        target = lo + point_idx[best]
+        chainage[target] = start_chainage[seg[best]] + along[best]
+        offset[target] = ux[best] * rel_y[best] - uy[best] * rel_x[best]
+        segment[target] = seg[best]
+
+    return AlignmentProjection(chainage, offset, segment)
+
+
+def bin_stations(projection: AlignmentProjection, zs: np.ndarray, station_spacing: float,
+                 station_tolerance: Optional[float] = None) -> List[StationProfile]:
+    # Punkt trafia do przekroju o najbliższym pikietażu k * station_spacing, jeśli jest od niego
+    # nie dalej niż station_tolerance (domyślnie połowa odstępu - wszystkie punkty korytarza)
+    if station_tolerance is None:
+        station_tolerance = station_spacing / 2
+    valid = np.flatnonzero(projection.segment >= 0)
+    chainage = projection.chainage[valid]
+    station = np.rint(chainage / station_spacing).astype(np.int64)
+    valid = valid[np.abs(chainage - station * station_spacing) <= station_tolerance]
+    station = np.rint(projection.chainage[valid] / station_spacing).astype(np.int64)
+
+    order = np.lexsort((projection.offset[valid], station))
+    valid, station = valid[order], station[order]
+    bounds = np.flatnonzero(np.diff(station)) + 1
+    profiles = []
+    for indices, st in zip(np.split(valid, bounds), np.split(station, bounds)):
+        if len(indices):
+            profiles.append(StationProfile(float(st[0] * station_spacing), indices, projection.offset[indices], zs[indices]))
+    return profiles
+
+
+def add_station_profiles(doc: Drawing, arrays: CoordinateArrays, stations: List[StationProfile], corridor_width: float,
+                         origin: Tuple[float, float] = (0.0, 0.0), columns: int = 10, row_height: Optional[float] = None,
+                         label_mode: str = LABEL_TEXT, label_spacing: Optional[float] = None,
+                         progress: Optional[Callable[[int], None]] = None) -> None:
+    # Przekroje rozkładane w siatce: columns przekrojów w wierszu, kolejne wiersze w dół
+    msp = doc.modelspace()
+    half_width = corridor_width / 2
+    column_width = corridor_width + 10
+    if row_height is None:
+        # Pełny zakres wysokości przekroju - punkty niższe od pierwszego też muszą zmieścić się w wierszu
+        spans = [float(s.z.max() - s.z.min()) for s in stations] or [0.0]
+        row_height = max(spans) + 10
+
+    code_names = arrays.code_names
+    done = 0
+    for k, station in enumerate(stations):
+        row, column = divmod(k, columns)
+        offset_x = origin[0] + column * column_width
+        offset_y = origin[1] - row * row_height
+        indices = station.indices
+        nrs = arrays.point_nrs(indices)
+        points = [(nr, 0.0, 0.0, z, code_names[c]) for nr, z, c in
+                  zip(nrs.tolist(), station.z.tolist(), arrays.code[indices].tolist())]
+        # Wysokości względem najniższego punktu przekroju - nic nie wchodzi poniżej linii bazowej wiersza
+        profile = ProfileArrays(nrs, station.offset + half_width, station.z - station.z.min())
+        add_profil(doc, profile, offset_x, offset_y, points, np.zeros(max(len(points) - 1, 0), dtype=bool),
+                   label_mode=label_mode, label_spacing=label_spacing)
+        msp.add_text(f'{station.chainage:.2f}', dxfattribs={'insert': (offset_x, offset_y - 1.0, 0), 'style': 'Standard',
+                                                            'height': 0.5, 'layer': 'Profil_stacja'})
+        done += len(indices)
+        if progress is not None:
+            progress(done)
+
+
+def alignment_profiles(doc: Drawing, arrays: CoordinateArrays, alignment: Sequence[Tuple[float, float]], corridor_width: float,
+                       station_spacing: float, station_tolerance: Optional[float] = None, **layout) -> List[StationProfile]:
+    projection = project_onto_alignment(arrays.x, arrays.y, alignment, corridor_width)
+    stations = bin_stations(projection, np.asarray(arrays.z), station_spacing, station_tolerance)
+    add_station_profiles(doc, arrays, stations, corridor_width, **layout)
+    return stations
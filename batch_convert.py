@@ -0,0 +1,358 @@
+import argparse
+import glob
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional, Union
+
+from ezdxf.filemanagement import new, readfile
+from alignment_profiles import alignment_profiles, read_alignment
+from coordinates import read_coordinate_arrays, read_coordinates
+from coordinate_cache import read_coordinate_arrays_cached, read_coordinates_cached
+from connect_points import CONNECT_MODES, CONNECT_SEQUENCE, DEFAULT_MAX_GAP, connect_points_with_lwpolyline
+from create_points import create_points
+from create_profiles import create_profiles
+from decimation import DecimationReport, estimate_savings
+from dxf_stream import StreamingDrawing, create_points_parallel, stream_points
+from incremental_update import update_points
+from instrumentation import Instrumentation, append_log, default_log_path, profile_path_for
+from point_labels import LABEL_MODES, LABEL_TEXT
+from surface import DEFAULT_CELL, DEFAULT_MAX_EDGE, add_contours
+from survey_formats import FORMATS, is_survey_file, parse_column_map, survey_name
+
+OPERATIONS = ('points', 'connect', 'profiles', 'alignment', 'contours')
+STATE_FILE = '.batch_state.json'
+
+
+def collect_inputs(patterns: List[str]) -> List[str]:
+    # Wzorce glob albo katalogi (wtedy wszystkie pliki w znanych formatach, także .gz i .zip)
+    inputs = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = [path for path in glob.glob(os.path.join(pattern, '*')) if is_survey_file(path)]
+        else:
+            matches = glob.glob(pattern, recursive=True)
+        inputs.extend(os.path.abspath(path) for path in matches if os.path.isfile(path))
+    return sorted(set(inputs))
+
+
+def output_path_for(input_path: str, output_dir: Optional[str]) -> str:
+    name = survey_name(input_path) + '.dxf'
+    return os.path.join(output_dir or os.path.dirname(input_path), name)
+
+
+def output_collisions(inputs: List[str], output_dir: Optional[str]) -> Dict[str, List[str]]:
+    # Pliki wejściowe dające ten sam plik wynikowy (a.txt i a.txt.gz albo d1/x.txt i d2/x.txt z -o) -
+    # równoległe zadania nadpisywałyby nawzajem swój DXF
+    outputs: Dict[str, List[str]] = {}
+    for input_path in inputs:
+        output_path = os.path.normcase(os.path.abspath(output_path_for(input_path, output_dir)))
+        outputs.setdefault(output_path, []).append(input_path)
+    return {output_path: paths for output_path, paths in outputs.items() if len(paths) > 1}
+
+
+def input_signature(input_path: str, operation: str, options: Dict) -> Dict:
+    stat = os.stat(input_path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'operation': operation, **options}
+
+
+def load_state(state_path: str) -> Dict[str, Dict]:
+    try:
+        with open(state_path) as stream:
+            return json.load(stream)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(state_path: str, state: Dict[str, Dict]) -> None:
+    with open(state_path, 'w') as stream:
+        json.dump(state, stream, indent=1)
+
+
+def empty_drawing_bytes() -> int:
+    # Rozmiar pustego rysunku (nagłówek, tabele, obiekty) - odejmowany przy szacowaniu rozmiaru punktu
+    stream = io.StringIO()
+    new().write(stream)
+    return len(stream.getvalue())
+
+
+def convert_file(operation: str, input_path: str, output_path: str, label_mode: str = LABEL_TEXT,
+                 label_spacing: Optional[float] = None, connect_mode: str = CONNECT_SEQUENCE,
+                 max_gap: float = DEFAULT_MAX_GAP, use_cache: bool = True, stream: bool = False,
+                 alignment: Optional[str] = None, corridor_width: float = 20.0, station_spacing: float = 25.0,
+                 station_tolerance: Optional[float] = None, update: bool = False, contour_interval: float = 1.0,
+                 grid_cell: float = DEFAULT_CELL, max_edge: float = DEFAULT_MAX_EDGE, decimate_cell: Optional[float] = None,
+                 simplify_tolerance: Optional[float] = None, profile_dir: Optional[str] = None,
+                 file_format: Optional[str] = None, columns: Optional[Dict[str, Union[int, str]]] = None,
+                 chunk_workers: int = 1) -> Dict:
+    # Uruchamiane w procesie roboczym - każdy plik ma własny Drawing
+    start = time.perf_counter()
+    result = {'input': input_path, 'output': output_path, 'points': 0, 'rejected': 0, 'error': None}
+    name = survey_name(input_path)
+    instrumentation = Instrumentation(operation, input_path, profile_path_for(name, profile_dir) if profile_dir else None)
+    stage = instrumentation.stage
+    try:
+        errors = []
+        if stream and operation == 'points' and not decimate_cell and chunk_workers <= 1:
+            # Plik czytany i zapisywany porcjami - pamięć nie rośnie z rozmiarem pliku
+            with stage('stream_points'):
+                result['points'] = stream_points(input_path, output_path, label_mode, label_spacing, errors=errors,
+                                                 file_format=file_format, columns=columns)
+            result['rejected'] = len(errors)
+        elif operation in ('alignment', 'contours'):
+            # Przekroje wzdłuż osi i warstwice - pracujemy na kolumnach, bez listy krotek
+            with stage('read_coordinates'):
+                if use_cache:
+                    arrays = read_coordinate_arrays_cached(input_path, errors, file_format=file_format, columns=columns)
+                else:
+                    arrays = read_coordinate_arrays(input_path, errors=errors, file_format=file_format, columns=columns)
+            result['points'] = len(arrays)
+            result['rejected'] = len(errors)
+            doc = new()
+            with stage(operation):
+                if operation == 'alignment':
+                    stations = alignment_profiles(doc, arrays, read_alignment(alignment), corridor_width, station_spacing,
+                                                  station_tolerance, label_mode=label_mode, label_spacing=label_spacing)
+                    result['stations'] = len(stations)
+                else:
+                    result['contours'] = add_contours(doc, arrays, contour_interval, grid_cell, max_edge)
+            with stage('saveas'):
+                doc.saveas(output_path)
+            instrumentation.count_entities(doc)
+        elif update and operation in ('points', 'connect') and os.path.exists(output_path):
+            # Dopisanie do istniejącego rysunku tylko nowych i zmienionych punktów
+            with stage('read_coordinates'):
+                read = read_coordinates_cached if use_cache else read_coordinates
+                points = read(input_path, errors, file_format=file_format, columns=columns)
+            result['rejected'] = len(errors)
+            with stage('readfile'):
+                doc = readfile(output_path)
+            with stage('update_points'):
+                summary = update_points(doc, points, label_mode=label_mode, label_spacing=label_spacing,
+                                        connect=operation == 'connect' and connect_mode == CONNECT_SEQUENCE)
+            if summary.added or summary.changed:
+                with stage('saveas'):
+                    doc.saveas(output_path)
+            result['points'] = summary.added + summary.changed
+            instrumentation.count_entities(doc)
+        else:
+            # Jeden duży plik rysowany w kilku procesach - punkty zostają w kolumnach, procesy dostają ich porcje
+            parallel = stream and operation == 'points' and chunk_workers > 1
+            with stage('read_coordinates'):
+                if parallel:
+                    read = read_coordinate_arrays_cached if use_cache else read_coordinate_arrays
+                    arrays = read(input_path, errors=errors, file_format=file_format, columns=columns)
+                else:
+                    read = read_coordinates_cached if use_cache else read_coordinates
+                    points = read(input_path, errors, file_format=file_format, columns=columns)
+            result['points'] = len(arrays if parallel else points)
+            result['rejected'] = len(errors)
+
+            def draw(doc) -> Optional[DecimationReport]:
+                if parallel:
+                    return create_points_parallel(arrays, doc, label_mode=label_mode, label_spacing=label_spacing,
+                                                  decimate_cell=decimate_cell, workers=chunk_workers)
+                if operation == 'profiles':
+                    create_profiles(points, doc=doc, label_mode=label_mode, label_spacing=label_spacing)
+                    return None
+                if operation == 'connect':
+                    return connect_points_with_lwpolyline(points, doc, label_mode=label_mode, label_spacing=label_spacing,
+                                                          connect_mode=connect_mode, max_gap=max_gap,
+                                                          decimate_cell=decimate_cell, simplify_tolerance=simplify_tolerance)
+                return create_points(points, doc, label_mode=label_mode, label_spacing=label_spacing,
+                                     decimate_cell=decimate_cell)
+
+            if stream:
+                # Encje trafiają do pliku w trakcie rysowania - zapis jest częścią etapu rysowania
+                with StreamingDrawing(output_path) as doc, stage(operation):
+                    report = draw(doc)
+                base_bytes = 0
+            else:
+                doc = new()
+                base_bytes = empty_drawing_bytes()
+                with stage(operation):
+                    report = draw(doc)
+                with stage('saveas'):
+                    doc.saveas(output_path)
+            instrumentation.count_entities(doc)
+            if report is not None and (decimate_cell or simplify_tolerance is not None):
+                result['points_removed'] = report.points_removed
+                result['vertices_removed'] = report.vertices_removed
+                result['entities_saved'], result['bytes_saved'] = estimate_savings(
+                    report, label_mode, os.path.getsize(output_path), base_bytes)
+        instrumentation.count('lines_parsed', result['points'] + result['rejected'])
+        instrumentation.count('rejected_lines', result['rejected'])
+        instrumentation.count_file(output_path)
+        result['bytes'] = os.path.getsize(output_path)
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    finally:
+        instrumentation.finish()
+    result['seconds'] = time.perf_counter() - start
+    result['instrumentation'] = instrumentation.to_dict()
+    return result
+
+
+def print_summary(results: List[Dict], skipped: List[str], elapsed: float, details: bool = False) -> None:
+    for result in sorted(results, key=lambda r: r['input']):
+        name = os.path.basename(result['input'])
+        if result['error']:
+            print(f"BŁĄD   {name}: {result['error']}")
+            continue
+        rate = result['points'] / result['seconds'] if result['seconds'] else 0.0
+        print(f"OK     {name}: {result['points']} pkt ({result['rejected']} odrzuconych) "
+              f"{result['seconds']:.2f} s, {rate:,.0f} pkt/s, {result['bytes'] / 1e6:.2f} MB")
+        if 'entities_saved' in result:
+            print(f"       przerzedzenie: -{result['points_removed']} pkt, -{result['vertices_removed']} wierzchołków, "
+                  f"ok. -{result['entities_saved']} encji, ok. -{result['bytes_saved'] / 1e6:.2f} MB")
+        stages = result['instrumentation']['stages']
+        print("       etapy: " + ', '.join(f"{stage} {seconds:.2f} s" for stage, seconds in stages.items()))
+        if details:
+            counters = result['instrumentation']['counters']
+            print("       liczniki: " + ', '.join(f"{counter} {value:,}" for counter, value in sorted(counters.items())))
+            if result['instrumentation']['profile']:
+                print(f"       profil: {result['instrumentation']['profile']}")
+    for input_path in skipped:
+        print(f"BEZ ZMIAN {os.path.basename(input_path)}")
+
+    done = [r for r in results if not r['error']]
+    total_points = sum(r['points'] for r in done)
+    rate = total_points / elapsed if elapsed else 0.0
+    print(f"Przetworzono {len(done)}/{len(results)} plików, pominięto {len(skipped)} bez zmian, "
+          f"{total_points} pkt w {elapsed:.2f} s ({rate:,.0f} pkt/s)")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Wsadowa konwersja plików z pomiarami (nr Y X Z KOD, CSV, GSI, LandXML) do DXF")
+    parser.add_argument('operation', choices=OPERATIONS,
+                        help="points - punkty z opisami, connect - łączenie punktów o tym samym kodzie, profiles - profile, "
+                             "alignment - przekroje poprzeczne wzdłuż osi, contours - warstwice z TIN")
+    parser.add_argument('inputs', nargs='+', help="pliki, wzorce glob albo katalogi")
+    parser.add_argument('-o', '--output-dir', help="katalog wynikowy (domyślnie obok pliku wejściowego)")
+    parser.add_argument('--format', choices=sorted(FORMATS), default=None, dest='file_format',
+                        help="format plików wejściowych (domyślnie rozpoznawany po zawartości i rozszerzeniu)")
+    parser.add_argument('--columns', default=None,
+                        help="mapa kolumn pliku tekstowego: kolejność pól, np. nr,x,y,z,code ('-' pomija kolumnę), "
+                             "albo nazwy z nagłówka, np. nr=Punkt,x=X,y=Y,z=H,code=Kod")
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count(), help="liczba procesów")
+    parser.add_argument('--label-mode', choices=LABEL_MODES, default=LABEL_TEXT)
+    parser.add_argument('--label-spacing', type=float, default=None)
+    parser.add_argument('--connect-mode', choices=CONNECT_MODES, default=CONNECT_SEQUENCE,
+                        help="connect: sequence - kolejne numery, nearest - najbliżsi sąsiedzi o tym samym kodzie")
+    parser.add_argument('--max-gap', type=float, default=DEFAULT_MAX_GAP, help="connect nearest: największy odstęp w polilinii")
+    parser.add_argument('--alignment', help="alignment: plik DXF z osią (pierwsza LWPOLYLINE)")
+    parser.add_argument('--corridor-width', type=float, default=20.0, help="alignment: szerokość korytarza wokół osi")
+    parser.add_argument('--station-spacing', type=float, default=25.0, help="alignment: odstęp przekrojów")
+    parser.add_argument('--station-tolerance', type=float, default=None,
+                        help="alignment: największa odległość punktu od przekroju wzdłuż osi (domyślnie pół odstępu)")
+    parser.add_argument('--contour-interval', type=float, default=1.0, help="contours: cięcie warstwic")
+    parser.add_argument('--grid-cell', type=float, default=DEFAULT_CELL, help="contours: bok oczka siatki interpolacji")
+    parser.add_argument('--max-edge', type=float, default=DEFAULT_MAX_EDGE,
+                        help="contours: najdłuższa krawędź trójkąta TIN - dłuższe traktujemy jako lukę w pomiarze")
+    parser.add_argument('--decimate-cell', type=float, default=None,
+                        help="points/connect: przerzedzenie - w oczku siatki o tym boku zostają punkty o skrajnych wysokościach")
+    parser.add_argument('--simplify', type=float, default=None, dest='simplify_tolerance',
+                        help="connect: tolerancja upraszczania polilinii (Douglas-Peucker)")
+    parser.add_argument('--update', action='store_true',
+                        help="points/connect: istniejący plik DXF uzupełnij o nowe i zmienione punkty zamiast tworzyć od nowa")
+    parser.add_argument('--stream', action='store_true', help="zapis strumieniowy do DXF R12 bez budowania rysunku w pamięci")
+    parser.add_argument('--chunk-workers', type=int, default=1,
+                        help="points --stream: liczba procesów rysujących porcje jednego pliku (dla bardzo dużych plików)")
+    parser.add_argument('--no-cache', action='store_true', help="nie używaj pamięci podręcznej wczytanych plików")
+    parser.add_argument('-f', '--force', action='store_true', help="przetwórz także pliki bez zmian")
+    parser.add_argument('-v', '--details', action='store_true', help="pokaż liczniki (linie, encje na warstwach, bajty)")
+    parser.add_argument('--profile', metavar='KATALOG', help="zapisz profil cProfile każdego pliku do katalogu")
+    parser.add_argument('--log', default=None, help=f"dziennik przebiegów JSON Lines (domyślnie {default_log_path()})")
+    parser.add_argument('--no-log', action='store_true', help="nie zapisuj dziennika przebiegów")
+    args = parser.parse_args(argv)
+    if args.operation == 'alignment' and not args.alignment:
+        parser.error("operacja alignment wymaga --alignment")
+    if args.stream and args.operation in ('alignment', 'contours'):
+        parser.error("--stream nie obsługuje operacji alignment i contours")
+    if args.chunk_workers > 1 and not (args.stream and args.operation == 'points'):
+        parser.error("--chunk-workers działa tylko z points i --stream")
+    if args.update and (args.stream or args.operation not in ('points', 'connect')):
+        parser.error("--update działa tylko z points i connect, bez --stream")
+    if args.update and args.operation == 'connect' and args.connect_mode != CONNECT_SEQUENCE:
+        parser.error("--update z connect obsługuje tylko --connect-mode sequence")
+    columns = None
+    if args.columns:
+        try:
+            columns = parse_column_map(args.columns)
+        except ValueError as e:
+            parser.error(str(e))
+
+    options = {'label_mode': args.label_mode, 'label_spacing': args.label_spacing,
+               'connect_mode': args.connect_mode, 'max_gap': args.max_gap, 'stream': args.stream}
+    if args.update:
+        options['update'] = True
+    if args.chunk_workers > 1:
+        options['chunk_workers'] = args.chunk_workers
+    if args.file_format or columns:
+        options.update(file_format=args.file_format, columns=columns)
+    if args.decimate_cell or args.simplify_tolerance is not None:
+        options.update(decimate_cell=args.decimate_cell, simplify_tolerance=args.simplify_tolerance)
+    if args.operation == 'alignment':
+        options.update(alignment=os.path.abspath(args.alignment), corridor_width=args.corridor_width,
+                       station_spacing=args.station_spacing, station_tolerance=args.station_tolerance)
+    if args.operation == 'contours':
+        options.update(contour_interval=args.contour_interval, grid_cell=args.grid_cell, max_edge=args.max_edge)
+    inputs = collect_inputs(args.inputs)
+    if not inputs:
+        print("Brak plików wejściowych")
+        return 1
+    collisions = output_collisions(inputs, args.output_dir)
+    if collisions:
+        print("Kilka plików wejściowych daje ten sam plik wynikowy:")
+        for output_path, paths in sorted(collisions.items()):
+            print(f"  {output_path}: {', '.join(paths)}")
+        return 1
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    # Stan poprzedniego przebiegu trzymamy obok wyników, osobno dla każdego katalogu
+    states: Dict[str, Dict[str, Dict]] = {}
+    jobs, skipped = [], []
+    for input_path in inputs:
+        output_path = output_path_for(input_path, args.output_dir)
+        state_path = os.path.join(os.path.dirname(output_path), STATE_FILE)
+        state = states.setdefault(state_path, load_state(state_path))
+        signature = input_signature(input_path, args.operation, options)
+        if not args.force and state.get(input_path) == signature and os.path.exists(output_path):
+            skipped.append(input_path)
+            continue
+        jobs.append((input_path, output_path, state_path, signature))
+
+    start = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=max(1, args.jobs)) as executor:
+        futures = {executor.submit(convert_file, args.operation, input_path, output_path, **options,
+                                   use_cache=not args.no_cache, profile_dir=args.profile):
+                   (input_path, state_path, signature)
+                   for input_path, output_path, state_path, signature in jobs}
+        for future in as_completed(futures):
+            input_path, state_path, signature = futures[future]
+            result = future.result()
+            results.append(result)
+            if not result['error']:
+                states[state_path][input_path] = signature
+    elapsed = time.perf_counter() - start
+
+    for state_path, state in states.items():
+        save_state(state_path, state)
+    if not args.no_log:
+        # Dziennik zapisuje tylko proces główny - procesy robocze nie piszą jednocześnie do jednego pliku
+        try:
+            for result in results:
+                append_log({**result['instrumentation'], 'error': result['error']}, args.log)
+        except OSError as e:
+            print(f"Nie zapisano dziennika przebiegów: {e}")
+    print_summary(results, skipped, elapsed, args.details)
+    return 1 if any(r['error'] for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,38 @@
+import os
+import sys
+import tempfile
+import time
+from typing import Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ezdxf.filemanagement import new
+from create_points import create_points
+from point_labels import LABEL_MODES, LABEL_TEXT
+from synthetic import survey_points
+
+
+def measure(points, mode: str, label_spacing: Optional[float], directory: str) -> Tuple[float, int, int]:
+    path = os.path.join(directory, f'{mode}_{label_spacing}.dxf')
+    start = time.perf_counter()
+    doc = new()
+    create_points(points, doc, label_mode=mode, label_spacing=label_spacing)
+    doc.saveas(path)
+    elapsed = time.perf_counter() - start
+    return elapsed, len(doc.modelspace()), os.path.getsize(path)
+
+
+def main(count: int = 50_000) -> None:
+    points = survey_points(count)
+    variants = [(mode, None) for mode in LABEL_MODES] + [(LABEL_TEXT, 5.0)]
+    with tempfile.TemporaryDirectory() as directory:
+        base_time, _, base_size = measure(points, LABEL_TEXT, None, directory)
+        print(f"{count} punktów")
+        print(f"{'tryb':<12}{'siatka':>8}{'encje':>10}{'czas [s]':>10}{'rozmiar [MB]':>14}{'vs text':>9}")
+        for mode, spacing in variants:
+            elapsed, entities, size = measure(points, mode, spacing, directory)
+            print(f"{mode:<12}{spacing or '-':>8}{entities:>10}{elapsed:>10.2f}{size / 1e6:>14.2f}{size / base_size:>8.0%}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50_000)
@@ -0,0 +1,53 @@
+import argparse
+import filecmp
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coordinates import read_coordinate_arrays
+from create_points import create_points
+from dxf_stream import StreamingDrawing, create_points_parallel
+from point_labels import LABEL_MODES, LABEL_TEXT
+from synthetic import survey_file
+
+# Rysowanie punktów jednego pliku w kilku procesach (zapis DXF R12) w porównaniu z create_points
+# na StreamingDrawing; pliki wynikowe muszą być identyczne bajt w bajt.
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Skalowanie create_points_parallel z liczbą procesów")
+    parser.add_argument('--count', type=int, default=500_000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    parser.add_argument('--label-mode', choices=LABEL_MODES, default=LABEL_TEXT)
+    parser.add_argument('--label-spacing', type=float, default=None)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        arrays = read_coordinate_arrays(survey_file(directory, args.count))
+        reference = os.path.join(directory, 'sequential.dxf')
+        start = time.perf_counter()
+        with StreamingDrawing(reference) as doc:
+            create_points(arrays.to_points(), doc, label_mode=args.label_mode, label_spacing=args.label_spacing)
+        base = time.perf_counter() - start
+        print(f"{args.count} punktów, create_points: {base:.2f} s")
+
+        failed = False
+        for workers in args.workers:
+            path = os.path.join(directory, f'parallel_{workers}.dxf')
+            start = time.perf_counter()
+            with StreamingDrawing(path) as doc:
+                create_points_parallel(arrays, doc, label_mode=args.label_mode, label_spacing=args.label_spacing,
+                                       workers=workers)
+            elapsed = time.perf_counter() - start
+            same = filecmp.cmp(reference, path, shallow=False)
+            failed |= not same
+            print(f"procesy {workers:>2}: {elapsed:.2f} s, przyspieszenie {base / elapsed:.2f}x, "
+                  f"{'identyczny' if same else 'RÓŻNY'} plik")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
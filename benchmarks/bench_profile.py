@@ -0,0 +1,50 @@
+import math
+import os
+import sys
+import time
+from typing import List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from create_profiles import plot_elevation_profile, segment_polylines
+from synthetic import survey_points
+
+
+def legacy_plot_elevation_profile(points: List[Tuple[int, float, float, float, str]], skipped_pairs) -> List[Tuple[int, float, float]]:
+    # Poprzednia implementacja plot_elevation_profile - punkt odniesienia dla pomiaru
+    reference_elevation = points[0][3]
+    elevations = [point[3] - reference_elevation for point in points]
+    distance_points = []
+    for i in range(1, len(points)):
+        if (points[i - 1][0], points[i][0]) in skipped_pairs:
+            distance_points.append(25)
+        else:
+            distance = math.sqrt((points[i][1] - points[i-1][1])**2 + (points[i][2] - points[i-1][2])**2)
+            distance_points.append(distance)
+    cumulative_distances = [0] + [sum(distance_points[:i]) for i in range(1, len(distance_points) + 1)]
+    return list(zip([point[0] for point in points], cumulative_distances, elevations))
+
+
+def timed(func, *args) -> Tuple[float, object]:
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main(sizes=(1_000, 10_000, 50_000)) -> None:
+    for size in sizes:
+        points = survey_points(size)
+        _, skipped_pairs = segment_polylines(points)
+
+        new_time, profile = timed(plot_elevation_profile, points, skipped_pairs)
+        old_time, legacy = timed(legacy_plot_elevation_profile, points, list(skipped_pairs))
+
+        legacy_distances = np.array([p[1] for p in legacy])
+        assert np.allclose(profile.distance, legacy_distances), "profile mismatch"
+
+        print(f"{size:>8} pkt  stara: {old_time:9.4f} s  nowa: {new_time:9.4f} s  przyspieszenie: {old_time / new_time:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Czas importu modułu okna w świeżym interpreterze (bez pamięci podręcznej modułów poprzedniego procesu).
+# Okno nie może ładować ezdxf ani numpy przy starcie - sprawdzamy to przy okazji.
+PROBE = ("import sys, time; start = time.perf_counter(); import {module}; "
+         "print(time.perf_counter() - start); print(','.join(m for m in ('ezdxf', 'numpy') if m in sys.modules))")
+DEFAULT_TARGET = 0.5  # [s] import okna na stacji roboczej
+
+
+def measure_import(module: str) -> tuple:
+    output = subprocess.run([sys.executable, '-c', PROBE.format(module=module)], cwd=ROOT, check=True,
+                            capture_output=True, text=True, env={**os.environ, 'QT_QPA_PLATFORM': 'offscreen'}).stdout.split('\n')
+    return float(output[0]), [m for m in output[1].split(',') if m]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Pomiar czasu startu okna window_points_dxf")
+    parser.add_argument('--module', default='window_points_dxf')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--target', type=float, default=DEFAULT_TARGET, help="największy dopuszczalny czas importu [s]")
+    args = parser.parse_args(argv)
+
+    measure_import(args.module)  # pierwszy przebieg tylko kompiluje .pyc
+    times, heavy = [], []
+    for _ in range(args.repeat):
+        seconds, heavy = measure_import(args.module)
+        times.append(seconds)
+    best = min(times)
+    print(f"import {args.module}: najlepszy {best:.3f} s, mediana {sorted(times)[len(times) // 2]:.3f} s (cel {args.target:.3f} s)")
+    if heavy:
+        print(f"BŁĄD: przy starcie załadowano {', '.join(heavy)}")
+        return 1
+    if best > args.target:
+        print("BŁĄD: przekroczony czas startu")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
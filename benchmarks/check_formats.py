@@ -0,0 +1,58 @@
+import argparse
+import gzip
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from survey_formats import iter_survey_points
+
+# Rozpoznawanie separatora, nagłówka i BOM w plikach tekstowych z pomiarem: (nazwa, zawartość, oczekiwane punkty).
+# Żadna linia nie może zostać odrzucona.
+CASES = [
+    ('spacje.txt', b'1 6000 5000 100 KR\n2 6001 5001 101 KR\n',
+     [(1, 5000.0, 6000.0, 100.0, 'KR'), (2, 5001.0, 6001.0, 101.0, 'KR')]),
+    # Przecinki w kodzie punktu nie czynią z pliku CSV
+    ('kod_z_przecinkami.txt', b'1 6000 5000 100 A,B,C\n2 6001 5001 101 A,B\n',
+     [(1, 5000.0, 6000.0, 100.0, 'A,B,C'), (2, 5001.0, 6001.0, 101.0, 'A,B')]),
+    ('kod_ze_srednikami.txt', b'Nr Y X Z Kod\n\n1 6000 5000 100 A;B;C\n',
+     [(1, 5000.0, 6000.0, 100.0, 'A;B;C')]),
+    ('przecinki.csv', b'1,6000,5000,100,KR\n', [(1, 5000.0, 6000.0, 100.0, 'KR')]),
+    ('cudzyslowy.csv', b'id,x,y,z,code\n"A1",5000,6000,100,"PL, 2"\n', [('A1', 5000.0, 6000.0, 100.0, 'PL, 2')]),
+    ('sredniki.csv', b'Punkt;X;Y;H;Opis\nP1;5000,5;6000,25;100;KR\n', [('P1', 5000.5, 6000.25, 100.0, 'KR')]),
+    ('tabulatory.txt', b'1\t6000\t5000\t100\tKR\n', [(1, 5000.0, 6000.0, 100.0, 'KR')]),
+    # Przecinek dziesiętny w plikach rozdzielanych spacjami i tabulatorami, z nagłówkiem i bez
+    ('przecinek_dziesietny.txt', b'1 6000,5 5000,25 100,0 KR\n2 6001 5001 101 KR\n',
+     [(1, 5000.25, 6000.5, 100.0, 'KR'), (2, 5001.0, 6001.0, 101.0, 'KR')]),
+    ('przecinek_dziesietny_tab.txt', b'1\t6000,5\t5000,25\t100,0\tKR\n', [(1, 5000.25, 6000.5, 100.0, 'KR')]),
+    ('przecinek_dziesietny_naglowek.txt', b'Nr Y X Z Kod\n1 6000,5 5000,25 100,0 KR\n',
+     [(1, 5000.25, 6000.5, 100.0, 'KR')]),
+    # UTF-8 z BOM: nagłówek musi zostać rozpoznany, a numer pierwszego punktu pozostać liczbą
+    ('bom.csv', b'\xef\xbb\xbfNr;X;Y;H;Kod\r\n1;5000;6000;100;A\r\n', [(1, 5000.0, 6000.0, 100.0, 'A')]),
+    ('bom.txt', b'\xef\xbb\xbf1 6000 5000 100 A\n', [(1, 5000.0, 6000.0, 100.0, 'A')]),
+]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Sprawdzenie czytnika plików tekstowych z pomiarem")
+    parser.parse_args(argv)
+
+    failed = False
+    with tempfile.TemporaryDirectory() as directory:
+        for name, content, expected in CASES:
+            for path, opener in ((os.path.join(directory, name), open), (os.path.join(directory, name + '.gz'), gzip.open)):
+                with opener(path, 'wb') as stream:
+                    stream.write(content)
+                errors = []
+                points = list(iter_survey_points(path, errors=errors))
+                ok = points == expected and not errors
+                failed |= not ok
+                print(f"{os.path.basename(path)}: {'OK' if ok else 'BŁĄD'}")
+                if not ok:
+                    print(f"  oczekiwano {expected}\n  wczytano   {points}, odrzucone linie {errors}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ezdxf
+import numpy as np
+from ezdxf.filemanagement import new
+from connect_points import connect_points_with_lwpolyline
+from coordinates import read_coordinate_arrays, read_coordinates
+from create_points import create_points
+from create_profiles import add_profil, calculate_profile_offset, plot_elevation_profile, segment_polylines
+from surface import add_contours
+from synthetic import survey_file
+
+SIZE_SUFFIXES = {'k': 1_000, 'M': 1_000_000}
+MAX_ARRAYS_RATIO = 1.2      # dopuszczalny stosunek czasu parse_arrays do parse
+MIN_COMPARE_POINTS = 10_000  # przy mniejszych plikach czasy są zbyt krótkie do porównania
+
+
+def parse_size(text: str) -> int:
+    if text[-1] in SIZE_SUFFIXES:
+        return int(float(text[:-1]) * SIZE_SUFFIXES[text[-1]])
+    return int(text)
+
+
+def run_stage(func: Callable, measure_memory: bool) -> Tuple[object, float, int]:
+    # Czas mierzony bez tracemalloc (który mocno spowalnia alokacje), szczyt pamięci w osobnym przebiegu
+    start = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - start
+    peak = None
+    if measure_memory:
+        del result
+        tracemalloc.start()
+        result = func()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result, seconds, peak
+
+
+def benchmark_size(count: int, data_dir: str, measure_memory: bool) -> List[Dict]:
+    input_path = survey_file(data_dir, count)
+    output_dir = tempfile.mkdtemp(prefix='cad_bench_')
+    results = []
+
+    def record(stage: str, func: Callable):
+        result, seconds, peak = run_stage(func, measure_memory)
+        results.append({'points': count, 'stage': stage, 'seconds': seconds, 'peak_bytes': peak,
+                        'points_per_second': count / seconds if seconds else None})
+        print(f"{count:>9} {stage:<24} {seconds:10.3f} s" + (f" {peak / 1e6:10.1f} MB" if peak is not None else ''))
+        return result
+
+    points = record('parse', lambda: read_coordinates(input_path))
+    # Czytnik kolumnowy nie może być wolniejszy od czytnika punktów, który zastępuje w ścieżkach tablicowych
+    arrays = record('parse_arrays', lambda: read_coordinate_arrays(input_path))
+    ratio = results[-1]['seconds'] / results[-2]['seconds'] if results[-2]['seconds'] else 0.0
+    results[-1]['vs_parse'] = ratio
+    if count >= MIN_COMPARE_POINTS and ratio > MAX_ARRAYS_RATIO:
+        print(f"UWAGA: read_coordinate_arrays {ratio:.2f}x wolniejsze od read_coordinates")
+    _, skipped_pairs = record('segmentation', lambda: segment_polylines(points))
+    profile = record('plot_elevation_profile', lambda: plot_elevation_profile(points, skipped_pairs))
+    offset_x, offset_y = calculate_profile_offset(points)
+    record('add_profil', lambda: add_profil(new(), profile, offset_x, offset_y, points, skipped_pairs))
+    record('connect_points', lambda: connect_points_with_lwpolyline(points, new()))
+    record('add_contours', lambda: add_contours(new(), arrays, 1.0))
+
+    def build_points():
+        doc = new()
+        create_points(points, doc)
+        return doc
+    doc = record('create_points', build_points)
+
+    output_path = os.path.join(output_dir, 'create_points.dxf')
+    record('saveas', lambda: doc.saveas(output_path))
+    results[-1]['bytes'] = os.path.getsize(output_path)
+    os.remove(output_path)
+    os.rmdir(output_dir)
+    return results
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Pomiar czasu i pamięci poszczególnych etapów na syntetycznych danych")
+    parser.add_argument('--sizes', nargs='+', default=['1k', '100k'], help="liczby punktów, np. 1k 100k 1M 5M")
+    parser.add_argument('--data-dir', default=os.path.join(tempfile.gettempdir(), 'cad_tools_bench'),
+                        help="katalog na wygenerowane pliki pomiarowe")
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--no-memory', action='store_true', help="bez pomiaru szczytowej pamięci (tracemalloc)")
+    args = parser.parse_args(argv)
+
+    results = []
+    for size in args.sizes:
+        results.extend(benchmark_size(parse_size(size), args.data_dir, not args.no_memory))
+
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'ezdxf': ezdxf.__version__,
+        'numpy': np.__version__,
+        'results': results,
+    }
+    with open(args.output, 'w') as stream:
+        json.dump(report, stream, indent=2)
+    print(f"Wyniki zapisane do {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import os
+import numpy as np
+from typing import List, Tuple
+
+# Udział kodów w typowym pomiarze sytuacyjno-wysokościowym
+CODES = ('TER', 'KR', 'OG', 'DR', 'SKP', 'BUD', 'ZIE')
+CODE_WEIGHTS = (0.55, 0.12, 0.08, 0.10, 0.06, 0.05, 0.04)
+
+SECTION_POINTS = 20       # punktów w przekroju
+SECTION_SPACING = 25.0    # odstęp przekrojów wzdłuż osi
+POINT_SPACING = 1.5       # odstęp punktów w przekroju
+CHUNK_SIZE = 500_000
+
+
+def survey_arrays(count: int, seed: int = 0, start: int = 0) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    # Punkty start..start+count: przekroje poprzeczne do łagodnie falującej osi.
+    # Kody losowane z CODE_WEIGHTS, kolejne punkty przekroju często dzielą kod (krawężnik, ogrodzenie).
+    rng = np.random.default_rng([seed, start])
+    i = np.arange(start, start + count)
+    section, station = np.divmod(i, SECTION_POINTS)
+
+    chainage = section * SECTION_SPACING
+    axis_x = 5000000.0 + chainage
+    axis_y = 7000000.0 + 200.0 * np.sin(chainage / 800.0)
+    heading = np.arctan(0.25 * np.cos(chainage / 800.0))
+    offset = (station - SECTION_POINTS / 2) * POINT_SPACING + rng.normal(0, 0.05, count)
+
+    x = axis_x - offset * np.sin(heading)
+    y = axis_y + offset * np.cos(heading)
+    z = 135.0 + 0.002 * chainage + 0.05 * np.abs(offset) + rng.normal(0, 0.02, count)
+
+    codes = rng.choice(len(CODES), size=count, p=CODE_WEIGHTS)
+    repeat = rng.random(count) < 0.6
+    repeat[station == 0] = False
+    repeat[0] = False
+    # Powtórzony kod przejmuje kod poprzedniego punktu
+    source = np.where(repeat, 0, np.arange(count))
+    np.maximum.accumulate(source, out=source)
+    return i + 1, x, y, z, codes[source]
+
+
+def survey_points(count: int, seed: int = 0) -> List[Tuple[int, float, float, float, str]]:
+    nr, x, y, z, codes = survey_arrays(count, seed)
+    return list(zip(nr.tolist(), x.tolist(), y.tolist(), z.tolist(), [CODES[c] for c in codes.tolist()]))
+
+
+def write_survey_file(path: str, count: int, seed: int = 0) -> str:
+    # Format oczekiwany przez read_coordinates: nr Y X Z KOD; plik zapisywany porcjami
+    with open(path, 'w') as stream:
+        for start in range(0, count, CHUNK_SIZE):
+            nr, x, y, z, codes = survey_arrays(min(CHUNK_SIZE, count - start), seed, start)
+            stream.writelines(f'{n} {yy:.3f} {xx:.3f} {zz:.3f} {CODES[c]}\n'
+                              for n, xx, yy, zz, c in zip(nr.tolist(), x.tolist(), y.tolist(), z.tolist(), codes.tolist()))
+    return path
+
+
+def survey_file(directory: str, count: int, seed: int = 0) -> str:
+    # Wygenerowane pliki są używane ponownie przy kolejnych przebiegach
+    path = os.path.join(directory, f'survey_{count}_{seed}.txt')
+    if not os.path.exists(path):
+        os.makedirs(directory, exist_ok=True)
+        write_survey_file(path + '.tmp', count, seed)
+        os.replace(path + '.tmp', path)
+    return path
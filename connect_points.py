@@ -1,13 +1,39 @@
-from create_profiles import  read_coordinates
+from coordinates import read_coordinates, format_malformed_lines, sort_by_nr
+import numpy as np
 from ezdxf.filemanagement import new
 from ezdxf.document import Drawing
-from typing import List, Tuple
+from typing import Callable, List, Optional, Tuple
+from decimation import DecimationReport, decimate_points, simplify_polylines
+from point_labels import LABEL_TEXT, add_labeled_points
+from spatial_index import chain_nearest
+from survey_formats import follows
 
-def connect_points_with_lwpolyline(points: List[Tuple[int, float, float, float, str]], doc: Drawing) -> None:
-    msp = doc.modelspace()
+CONNECT_SEQUENCE = 'sequence'  # kolejne numery z tym samym kodem
+CONNECT_NEAREST = 'nearest'    # najbliżsi sąsiedzi w obrębie kodu, niezależnie od numeracji
+CONNECT_MODES = (CONNECT_SEQUENCE, CONNECT_NEAREST)
+DEFAULT_MAX_GAP = 10.0
+CONNECT_LAYER = 'connect_points'
 
-    # Sort points by their number
-    sorted_points = sorted(points, key=lambda x: x[0])
+
+def connect_by_code(points: List[Tuple[int, float, float, float, str]], max_gap: float = DEFAULT_MAX_GAP) -> List[List[Tuple[float, float]]]:
+    # Grupujemy punkty po kodzie i w każdej grupie łączymy najbliższych sąsiadów (siatka zamiast porównań każdy z każdym)
+    xs = np.fromiter((p[1] for p in points), dtype=np.float64, count=len(points))
+    ys = np.fromiter((p[2] for p in points), dtype=np.float64, count=len(points))
+    groups = {}
+    for i, point in enumerate(points):
+        groups.setdefault(point[4], []).append(i)
+
+    polylines = []
+    for indices in groups.values():
+        for chain in chain_nearest(xs, ys, np.array(indices), max_gap):
+            if len(chain) > 1:
+                polylines.append([(points[i][1], points[i][2]) for i in chain])
+    return polylines
+
+
+def connect_by_sequence(sorted_points: List[Tuple[int, float, float, float, str]]) -> List[List[Tuple[float, float]]]:
+    # Kolejne numery z tym samym kodem tworzą jedną polilinię
+    polylines = []
 
     # Initialize a list to store polyline vertices
     polyline = []
@@ -17,35 +43,68 @@ def connect_points_with_lwpolyline(points: List[Tuple[int, float, float, float,
         nr, x, y, z, desc = sorted_points[i]
 
         # If it's not the first point and the previous point has the same description and sequential number
-        if i > 0 and sorted_points[i - 1][0] == nr - 1 and sorted_points[i - 1][4] == desc:
+        if i > 0 and follows(sorted_points[i - 1][0], nr) and sorted_points[i - 1][4] == desc:
             # Add the point to the polyline
             polyline.append((x, y))
         else:
-            # If the polyline has points, add it to the drawing
+            # If the polyline has points, keep it
             if polyline:
-                msp.add_lwpolyline(polyline, dxfattribs={'layer': 'connect_points'})
+                polylines.append(polyline)
                 polyline = []  # Reset the polyline
 
             # Start a new polyline with the current point
             polyline.append((x, y))
 
-        # Add point representing height
-        msp.add_point(location=(x, y, z), dxfattribs={'layer': 'POINTS'})
+    # If there are remaining points in the polyline, keep it
+    if polyline:
+        polylines.append(polyline)
+    return polylines
 
-        # Add shifted description to point with number and separate text with description
-        msp.add_text(f'{nr}', dxfattribs={'insert': (x-0.4, y+0.1, z + 0.2), 'style': 'Standard', 'height': 0.1})
-        msp.add_text(desc, dxfattribs={'insert': (x+0.1, y+0.1, z + 0.2), 'style': 'Standard', 'height': 0.1})
 
-    # If there are remaining points in the polyline, add it to the drawing
-    if polyline:
-        msp.add_lwpolyline(polyline, dxfattribs={'layer': 'connect_points'})
+def connect_points_with_lwpolyline(points: List[Tuple[int, float, float, float, str]], doc: Drawing, label_mode: str = LABEL_TEXT,
+                                   label_spacing: Optional[float] = None, progress: Optional[Callable[[int], None]] = None,
+                                   connect_mode: str = CONNECT_SEQUENCE, max_gap: float = DEFAULT_MAX_GAP,
+                                   decimate_cell: Optional[float] = None,
+                                   simplify_tolerance: Optional[float] = None) -> DecimationReport:
+    # decimate_cell przerzedza tylko rysowane punkty - polilinie powstają ze wszystkich punktów,
+    # a simplify_tolerance upraszcza je algorytmem Douglasa-Peuckera
+    if connect_mode not in CONNECT_MODES:
+        raise ValueError(f"Nieznany tryb łączenia punktów: {connect_mode}")
+    msp = doc.modelspace()
+
+    # Sort points by their number
+    sorted_points = sort_by_nr(points)
+
+    if connect_mode == CONNECT_NEAREST:
+        polylines = connect_by_code(sorted_points, max_gap)
+    else:
+        polylines = connect_by_sequence(sorted_points)
+
+    vertices = sum(len(polyline) for polyline in polylines)
+    report = DecimationReport(len(sorted_points), len(sorted_points), vertices, vertices)
+    if simplify_tolerance is not None:
+        polylines, simplified = simplify_polylines(polylines, simplify_tolerance)
+        report = report._replace(vertices_after=simplified.vertices_after)
+    for polyline in polylines:
+        msp.add_lwpolyline(polyline, dxfattribs={'layer': CONNECT_LAYER})
+
+    # Add points with number and description labels
+    if decimate_cell:
+        sorted_points = decimate_points(sorted_points, decimate_cell)
+        report = report._replace(points_after=len(sorted_points))
+    add_labeled_points(doc, sorted_points, mode=label_mode, label_spacing=label_spacing, progress=progress)
+    return report
+
 
 if __name__ == "__main__":
     input_file_path = 'D:/ROBOTA/GEOPARTNER/dom/GRAN TG.txt'
     output_dxf_path = 'D:/ROBOTA/GEOPARTNER/dom/gran_tg.dxf'
 
     # Read coordinates
-    points = read_coordinates(input_file_path)
+    errors = []
+    points = read_coordinates(input_file_path, errors)
+    if errors:
+        print(f"Pominięto {len(errors)} niepoprawnych linii:\n{format_malformed_lines(errors)}")
 
     # Create a new DXF file
     doc = new()
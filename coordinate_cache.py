@@ -0,0 +1,162 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+from typing import List, Optional
+
+from coordinates import ColumnMap, CoordinateArrays, MalformedLine, Point, read_coordinate_arrays
+
+# Pamięć podręczna wczytanych plików:
+#   <cache>/paths/<sha1 ścieżki>.json  - rozmiar, mtime i skrót zawartości pliku
+#   <cache>/data/<skrót zawartości>/   - kolumny .npy (czytane przez mmap) i meta.json
+# Czas modyfikacji katalogu wpisu służy jako znacznik ostatniego użycia (LRU). Plik czytany z wymuszonym
+# formatem albo mapą kolumn ma osobny wpis (skrót zawartości + skrót opcji czytnika).
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+COLUMNS = ('nr', 'x', 'y', 'z', 'code')
+OPTIONAL_COLUMNS = ('point_id',)
+CACHE_VERSION = 2   # zmiana sposobu parsowania - starsze wpisy są wczytywane od nowa
+
+
+def default_cache_dir() -> str:
+    base = os.environ.get('CAD_TOOLS_CACHE')
+    if base:
+        return base
+    return os.path.join(os.environ.get('LOCALAPPDATA') or os.path.expanduser('~/.cache'), 'cad_tools')
+
+
+def file_digest(file_path: str, block_size: int = 1024 * 1024) -> str:
+    digest = hashlib.blake2b(digest_size=20)
+    with open(file_path, 'rb') as stream:
+        for block in iter(lambda: stream.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_coordinate_arrays_cached(file_path: str, errors: Optional[List[MalformedLine]] = None,
+                                  cache_dir: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES,
+                                  file_format: Optional[str] = None, columns: Optional[ColumnMap] = None) -> CoordinateArrays:
+    cache_dir = cache_dir or default_cache_dir()
+    file_path = os.path.abspath(file_path)
+    stat = os.stat(file_path)
+
+    ref_path = os.path.join(cache_dir, 'paths', hashlib.sha1(file_path.encode('utf-8')).hexdigest() + '.json')
+    ref = _load_json(ref_path)
+    if ref and ref.get('size') == stat.st_size and ref.get('mtime_ns') == stat.st_mtime_ns:
+        digest = ref['digest']
+    else:
+        digest = file_digest(file_path)
+
+    entry_name = digest
+    if file_format is not None or columns is not None:
+        options = json.dumps({'format': file_format, 'columns': columns}, sort_keys=True)
+        entry_name += '-' + hashlib.sha1(options.encode('utf-8')).hexdigest()[:12]
+    entry = os.path.join(cache_dir, 'data', entry_name)
+    meta = _load_json(os.path.join(entry, 'meta.json'))
+    if meta is not None and meta.get('version') != CACHE_VERSION:
+        # Wpis starszej wersji usuwamy - nowy nie zastąpi niepustego katalogu
+        shutil.rmtree(entry, ignore_errors=True)
+        meta = None
+    if meta is not None:
+        try:
+            arrays = _load_entry(entry, meta)
+        except (OSError, ValueError):
+            meta = None
+        else:
+            try:
+                os.utime(entry)
+            except OSError:
+                pass
+    if meta is None:
+        parse_errors = []
+        arrays = read_coordinate_arrays(file_path, errors=parse_errors, file_format=file_format, columns=columns)
+        meta = {'version': CACHE_VERSION, 'code_names': arrays.code_names, 'errors': parse_errors}
+        _store_entry(entry, arrays, meta)
+        evict(cache_dir, max_bytes, keep=entry_name)
+
+    if not ref or ref.get('digest') != digest or ref.get('mtime_ns') != stat.st_mtime_ns:
+        try:
+            _write_json(ref_path, {'path': file_path, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'digest': digest})
+        except OSError:
+            pass
+    if errors is not None:
+        errors.extend((line_no, text) for line_no, text in meta['errors'])
+    return arrays
+
+
+def read_coordinates_cached(file_path: str, errors: Optional[List[MalformedLine]] = None,
+                            cache_dir: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES,
+                            file_format: Optional[str] = None, columns: Optional[ColumnMap] = None) -> List[Point]:
+    return read_coordinate_arrays_cached(file_path, errors, cache_dir, max_bytes, file_format, columns).to_points()
+
+
+def evict(cache_dir: str, max_bytes: int = DEFAULT_MAX_BYTES, keep: Optional[str] = None) -> None:
+    # Usuwa najdawniej używane wpisy, aż łączny rozmiar zmieści się w max_bytes
+    data_dir = os.path.join(cache_dir, 'data')
+    if not os.path.isdir(data_dir):
+        return
+    entries = []
+    for name in os.listdir(data_dir):
+        path = os.path.join(data_dir, name)
+        try:
+            size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+            entries.append((os.path.getmtime(path), size, name, path))
+        except OSError:
+            # Nie katalog albo usunięty w międzyczasie przez inny proces
+            continue
+
+    total = sum(size for _, size, _, _ in entries)
+    for _, size, name, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if name == keep:
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+        total -= size
+
+
+def _load_entry(entry: str, meta: dict) -> CoordinateArrays:
+    columns = []
+    for name in COLUMNS:
+        path = os.path.join(entry, name + '.npy')
+        # Pustej tablicy nie da się zmapować do pamięci
+        columns.append(np.load(path, mmap_mode='r') if os.path.getsize(path) > 128 else np.load(path))
+    point_id = None
+    if os.path.exists(os.path.join(entry, 'point_id.npy')):
+        point_id = np.load(os.path.join(entry, 'point_id.npy'), mmap_mode='r')
+    return CoordinateArrays(*columns, meta['code_names'], point_id)
+
+
+def _store_entry(entry: str, arrays: CoordinateArrays, meta: dict) -> None:
+    # Zapis do katalogu tymczasowego i zamiana nazwy - inne procesy nigdy nie widzą niepełnego wpisu
+    tmp = None
+    try:
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        tmp = tempfile.mkdtemp(dir=os.path.dirname(entry), prefix='.tmp-')
+        for name in COLUMNS + OPTIONAL_COLUMNS:
+            if getattr(arrays, name) is not None:
+                np.save(os.path.join(tmp, name + '.npy'), getattr(arrays, name))
+        _write_json(os.path.join(tmp, 'meta.json'), meta)
+        os.replace(tmp, entry)
+    except OSError:
+        # Wpis mógł już zostać zapisany przez inny proces albo katalog cache jest niedostępny -
+        # wtedy po prostu zwracamy wczytane dane bez zapisu
+        if tmp is not None:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _load_json(path: str) -> Optional[dict]:
+    try:
+        with open(path, encoding='utf-8') as stream:
+            return json.load(stream)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path: str, data: dict) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as stream:
+        json.dump(data, stream)
+    os.replace(tmp, path)
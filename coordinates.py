@@ -0,0 +1,127 @@
+import numpy as np
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence
+
+# Typy i parsowanie linii mieszkają w survey_formats (czytniki formatów); tu kolumny i porcje punktów
+from survey_formats import ColumnMap, MalformedLine, Point, iter_survey_columns, iter_survey_points, nr_sort_key, point_nr
+
+DEFAULT_CHUNK_SIZE = 100_000
+
+
+class CoordinateArrays(NamedTuple):
+    nr: np.ndarray          # int64; dla identyfikatorów alfanumerycznych liczba z końca identyfikatora (do sortowania)
+    x: np.ndarray           # float64
+    y: np.ndarray           # float64
+    z: np.ndarray           # float64
+    code: np.ndarray        # int32, indeks do code_names
+    code_names: List[str]
+    point_id: Optional[np.ndarray] = None   # str; tylko gdy w pliku są identyfikatory alfanumeryczne
+
+    def __len__(self) -> int:
+        return len(self.nr)
+
+    def descriptions(self) -> np.ndarray:
+        return np.asarray(self.code_names, dtype=object)[self.code]
+
+    def point_nrs(self, indices: Optional[np.ndarray] = None) -> np.ndarray:
+        # Numery punktów takie jak w Point: int64, a przy identyfikatorach alfanumerycznych tablica obiektów
+        if self.point_id is None:
+            return self.nr if indices is None else self.nr[indices]
+        ids = self.point_id if indices is None else self.point_id[indices]
+        return np.array([point_nr(i) for i in ids.tolist()], dtype=object)
+
+    def nr_order(self) -> np.ndarray:
+        # Indeksy punktów w kolejności numerów, jak sort_by_nr (sortowanie stabilne)
+        if self.point_id is None:
+            return np.argsort(self.nr, kind='stable')
+        nrs = self.point_nrs().tolist()
+        return np.array(sorted(range(len(nrs)), key=lambda i: nr_sort_key(nrs[i])), dtype=np.int64)
+
+    def to_points(self) -> List[Point]:
+        names = self.code_names
+        return list(zip(self.point_nrs().tolist(), self.x.tolist(), self.y.tolist(), self.z.tolist(),
+                        [names[c] for c in self.code.tolist()]))
+
+
+def sort_by_nr(points: Sequence[Point]) -> List[Point]:
+    # Same numery liczbowe sortujemy bezpośrednio; z identyfikatorami alfanumerycznymi - po przedrostku i liczbie
+    if all(type(p[0]) is int for p in points):
+        return sorted(points, key=lambda p: p[0])
+    return sorted(points, key=lambda p: nr_sort_key(p[0]))
+
+
+def nr_array(points: Sequence[Point]) -> np.ndarray:
+    # Numery punktów jako int64, a gdy są wśród nich identyfikatory alfanumeryczne - jako tablica obiektów
+    nrs = [p[0] for p in points]
+    if all(type(nr) is int for nr in nrs):
+        return np.array(nrs, dtype=np.int64)
+    return np.array(nrs, dtype=object)
+
+
+def iter_coordinates(file_path: str, errors: Optional[List[MalformedLine]] = None, file_format: Optional[str] = None,
+                     columns: Optional[ColumnMap] = None) -> Iterator[Point]:
+    # Format rozpoznawany po zawartości i rozszerzeniu (survey_formats.FORMATS), pliki .gz/.zip czytane w locie
+    return iter_survey_points(file_path, file_format, columns, errors)
+
+
+def iter_coordinate_chunks(file_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                           errors: Optional[List[MalformedLine]] = None, file_format: Optional[str] = None,
+                           columns: Optional[ColumnMap] = None) -> Iterator[List[Point]]:
+    chunk = []
+    for point in iter_coordinates(file_path, errors, file_format, columns):
+        chunk.append(point)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def read_coordinates(file_path: str, errors: Optional[List[MalformedLine]] = None, file_format: Optional[str] = None,
+                     columns: Optional[ColumnMap] = None) -> List[Point]:
+    return list(iter_coordinates(file_path, errors, file_format, columns))
+
+
+def read_coordinate_arrays(file_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                           errors: Optional[List[MalformedLine]] = None, file_format: Optional[str] = None,
+                           columns: Optional[ColumnMap] = None) -> CoordinateArrays:
+    code_index: Dict[str, int] = {}
+    nr_parts, x_parts, y_parts, z_parts, code_parts = [], [], [], [], []
+    id_parts: List[Optional[np.ndarray]] = []
+
+    # Czytnik oddaje porcje od razu w listach kolumn - bez krotki Point na każdy punkt
+    for chunk in iter_survey_columns(file_path, chunk_size, file_format, columns, errors):
+        nrs = chunk.nr
+        if all(type(nr) is int for nr in nrs):
+            nr_parts.append(np.array(nrs, dtype=np.int64))
+            id_parts.append(None)
+        else:
+            # Identyfikatory alfanumeryczne w osobnej kolumnie, w nr zostaje liczba do sortowania
+            nr_parts.append(np.array([nr_sort_key(nr)[1] for nr in nrs], dtype=np.int64))
+            id_parts.append(np.array([str(nr) for nr in nrs]))
+        x_parts.append(np.array(chunk.x, dtype=np.float64))
+        y_parts.append(np.array(chunk.y, dtype=np.float64))
+        z_parts.append(np.array(chunk.z, dtype=np.float64))
+        # Kody zapisujemy słownikowo: tablica indeksów + lista unikalnych nazw
+        code_parts.append(np.fromiter((code_index.setdefault(d, len(code_index)) for d in chunk.code),
+                                      dtype=np.int32, count=len(chunk.code)))
+
+    if not nr_parts:
+        return empty_coordinate_arrays()
+
+    point_id = None
+    if any(ids is not None for ids in id_parts):
+        point_id = np.concatenate([nrs.astype(str) if ids is None else ids for nrs, ids in zip(nr_parts, id_parts)])
+    return CoordinateArrays(np.concatenate(nr_parts), np.concatenate(x_parts), np.concatenate(y_parts),
+                            np.concatenate(z_parts), np.concatenate(code_parts), list(code_index), point_id)
+
+
+def empty_coordinate_arrays() -> CoordinateArrays:
+    return CoordinateArrays(np.empty(0, dtype=np.int64), np.empty(0), np.empty(0), np.empty(0),
+                            np.empty(0, dtype=np.int32), [])
+
+
+def format_malformed_lines(errors: List[MalformedLine], limit: int = 10) -> str:
+    lines = [f"linia {line_no}: {text}" for line_no, text in errors[:limit]]
+    if len(errors) > limit:
+        lines.append(f"... i {len(errors) - limit} więcej")
+    return '\n'.join(lines)
@@ -1,8 +1,22 @@
 import math
+import numpy as np
 import matplotlib.pyplot as plt
-from typing import List, Tuple
-from ezdxf.filemanagement import readfile, new
+from typing import Callable, List, NamedTuple, Optional, Set, Tuple, Union
+from ezdxf.filemanagement import new
 from ezdxf.document import Drawing
+from coordinates import nr_array, read_coordinates, format_malformed_lines
+from point_labels import LABEL_TEXT, add_labeled_points
+
+PROFILE_GAP = 25.0  # odstęp wstawiany w profilu między przekrojami
+
+
+class ProfileArrays(NamedTuple):
+    nr: np.ndarray          # numery punktów
+    distance: np.ndarray    # odległość narastająca
+    elevation: np.ndarray   # różnica wysokości względem pierwszego punktu
+
+    def __len__(self) -> int:
+        return len(self.nr)
 
 
 def calculate_azimuth(x1: float, y1: float, x2: float, y2: float) -> float:
@@ -11,174 +25,197 @@ def calculate_azimuth(x1: float, y1: float, x2: float, y2: float) -> float:
     azimuth = math.degrees(math.atan2(dy, dx))    
     return azimuth if azimuth >= 0 else azimuth + 360.0
 
-def read_coordinates(file_path: str) -> List[Tuple[int, float, float, float, str]]:
-    measurements = []
-    with open(file_path) as stream:
-        content = stream.read()
-        cleaned_lines = ["\t".join(line.split()) for line in content.split('\n')]
-        measurements.extend(cleaned_lines)
-    return [(int(''.join(filter(str.isdigit, line.split('\t')[0]))), 
-             float(line.split('\t')[2]), 
-             float(line.split('\t')[1]),
-             float(line.split('\t')[3]), 
-             str(line.split('\t')[4])) for line in measurements if len(line) > 3]
 
+def segment_polylines(points: List[Tuple[int, float, float, float, str]]) -> Tuple[List[np.ndarray], Set[Tuple[int,int]]]:
+    skipped_pairs = set()
+    if len(points) < 3:
+        return [], skipped_pairs
 
-def create_dxf_file(points: List[Tuple[int, float, float, float, str]], output_dxf_path: str, skipped_pairs: List[Tuple[int,int]]) -> List[Tuple[int,int]]:
-    doc = new()
-    msp = doc.modelspace()
+    xs = np.fromiter((p[1] for p in points), dtype=np.float64, count=len(points))
+    ys = np.fromiter((p[2] for p in points), dtype=np.float64, count=len(points))
+
+    # Długości i azymuty wszystkich odcinków naraz
+    dx, dy = np.diff(xs), np.diff(ys)
+    distances = np.hypot(dx, dy)
+    azimuths = np.degrees(np.arctan2(dy, dx)) % 360.0
 
-    current_polyline_points = []  # Lista przechowująca pary (nr, x, y), między którymi jest rysowana polilinia
+    # Trójka i = punkty (i, i+1, i+2): przełamanie gdy różnica azymutów > 60 stopni,
+    # trójka dokłada wierzchołki do polilinii gdy dodatkowo odcinek i -> i+1 nie przekracza 10
+    turns = np.abs(azimuths[1:] - azimuths[:-1])
+    breaks = turns > 60
+    extends = ~breaks & (distances[:-1] <= 10)
 
-    for i in range(len(points) - 2):
-        nr1, x1, y1, z1, desc1 = points[i]
-        nr2, x2, y2, z2, desc2 = points[i + 1]
-        nr3, x3, y3, z3, desc3 = points[i + 2]
+    # Numer polilinii, do której należy każda trójka
+    run_ids = np.cumsum(breaks) - breaks
+    n = len(points)
 
-        # Oblicz odległość między punktami (x1, y1) i (x2, y2)
-        distance = math.sqrt((x2 - x1)**2 + (y2 - y1)**2)
+    # Klucz (polilinia, wierzchołek) - unikalne klucze to zdeduplikowane wierzchołki każdej polilinii w kolejności
+    triples = np.flatnonzero(extends)
+    vertices = (triples[:, None] + np.arange(3)).ravel()
+    keys = np.unique(np.repeat(run_ids[triples], 3) * n + vertices)
 
-        azimuth1 = calculate_azimuth(x1, y1, x2, y2)
-        azimuth2 = calculate_azimuth(x2, y2, x3, y3)
+    # Para (i, i+1) na przełamaniu jest pomijana, jeśli któryś z punktów nie należy do bieżącej polilinii
+    break_idx = np.flatnonzero(breaks)
+    break_keys = run_ids[break_idx] * n + break_idx
+    first_in = np.isin(break_keys, keys, assume_unique=True)
+    second_in = np.isin(break_keys + 1, keys, assume_unique=True)
+    for i in break_idx[~(first_in & second_in)].tolist():
+        skipped_pairs.add((points[i][0], points[i + 1][0]))
 
-        # Sprawdź czy różnica azymutów między dwiema kolejnymi parami punktów nie przekracza 60 stopni
-        if abs(azimuth2 - azimuth1) <= 60:
-            # Sprawdź czy odległość między punktami nie przekracza 10
-            if distance <= 10:
-                current_polyline_points.extend([(x1, y1), (x2, y2), (x3, y3)])
-        else:
-            # Sprawdź, czy punkty (nr2, x2, y2) i (nr3, x3, y3) nie są już w current_polyline_points
-            if (x1, y1) not in current_polyline_points or (x2, y2) not in current_polyline_points:
-                # Dodaj parę punktów (x2, y2) i (x3, y3) do listy skipped_pairs
-                skipped_pairs.append((nr1, nr2))
+    key_runs = keys // n
+    split_at = np.flatnonzero(np.diff(key_runs)) + 1
+    runs = [run for run in np.split(keys % n, split_at) if len(run) > 1]
+    return runs, skipped_pairs
 
-            if current_polyline_points:
-                msp.add_lwpolyline([(x, y) for x, y in current_polyline_points], dxfattribs={'layer': 'Poprzeczka'})
-            current_polyline_points = []
 
-    for nr, x, y, z, desc in points:
-        # Add point representing height
-        msp.add_point(location=(x, y, z), dxfattribs={'layer': 'POINTS'})
+def add_plan_view(doc: Drawing, points: List[Tuple[int, float, float, float, str]], skipped_pairs: Optional[Set[Tuple[int,int]]] = None,
+                  label_mode: str = LABEL_TEXT, label_spacing: Optional[float] = None,
+                  progress: Optional[Callable[[int], None]] = None) -> Set[Tuple[int,int]]:
+    msp = doc.modelspace()
 
-        # Add shifted description to point with number and separate text with description
-        msp.add_text(f'{nr}', dxfattribs={'insert': (x-0.4, y+0.1, z + 0.2), 'style': 'Standard', 'height': 0.1})
-        msp.add_text(desc, dxfattribs={'insert': (x+0.1, y+0.1, z + 0.2), 'style': 'Standard', 'height': 0.1})
+    if skipped_pairs is None:
+        skipped_pairs = set()
 
-    # Save DXF file
-    doc.saveas(output_dxf_path)
+    runs, new_skipped_pairs = segment_polylines(points)
+    skipped_pairs |= new_skipped_pairs
+    for run in runs:
+        msp.add_lwpolyline([(points[i][1], points[i][2]) for i in run.tolist()], dxfattribs={'layer': 'Poprzeczka'})
+
+    # Add points with number and description labels
+    add_labeled_points(doc, points, mode=label_mode, label_spacing=label_spacing, progress=progress)
 
     return skipped_pairs
 
 
-def add_profil(doc: Drawing, plot_points: List[Tuple[int, float, float]], offset_x: float, offset_y: float, points: List[Tuple[int, float, float, float, str]], skipped_pairs: List[Tuple[int,int]]) -> None:
-    msp = doc.modelspace()
+def create_dxf_file(points: List[Tuple[int, float, float, float, str]], output_dxf_path: str, skipped_pairs: Optional[Set[Tuple[int,int]]] = None,
+                    label_mode: str = LABEL_TEXT, label_spacing: Optional[float] = None) -> Set[Tuple[int,int]]:
+    doc = new()
+    skipped_pairs = add_plan_view(doc, points, skipped_pairs, label_mode, label_spacing)
 
-    # Add profile vertices and lines
-    for i in range(len(plot_points) - 1):
-        point1 = plot_points[i]
-        point2 = plot_points[i + 1]
-        x1, y1 = point1[1], point1[2]
-        x2, y2 = point2[1], point2[2]
-
-        # Calculate distance between points
-        distance = math.sqrt((x2 - x1)**2 + (y2 - y1)**2)
-
-        # Check if distance is greater than 10
-        if distance > 10:
-            continue
-        # Add offset to point coordinates
-        x1 += offset_x
-        y1 += offset_y
-        x2 += offset_x
-        y2 += offset_y
-        point_offset1 =  x1, y1
-        point_offset2 =  x2, y2
-        
-        # Extract point numbers for checking if the pair is in skipped_pairs
-        nr1, nr2 = points[i][0], points[i+1][0]
-
-        # Check if the pair of point numbers is in skipped_pairs and not in plot_points
-        if (nr1, nr2) in skipped_pairs and (nr1, nr2) not in [(coord[0], coord[1]) for coord in plot_points]:
-            continue
-        # Dodaj linię tylko wtedy, gdy para numerów punktów nie znajduje się w skipped_pairs
-        msp.add_lwpolyline([point_offset1, point_offset2], dxfattribs={'layer': 'Profil_wysokosciowy'})
-        
-    # Add profile vertices points
-    for nr, cumulative_distance, elevation in plot_points:
-        cumulative_distance = offset_x + cumulative_distance
-        elevation = offset_y + elevation
-
-        # Add point only if it is not in skipped_pairs and in plot_points
-        msp.add_point(location=(cumulative_distance, elevation), dxfattribs={'layer': 'Profile_POiNT'})
-
-
-    # Add numbering and description to each point
-    for i in range(len(points)):
-        nr, _, _, _, desc = points[i]
-        x, y = plot_points[i][1], plot_points[i][2]  # Use plot_points to determine text insertion point
-        x += offset_x
-        y += offset_y
-        msp.add_text(f'{nr}', dxfattribs={'insert': (x-0.4, y+0.1, 0), 'style': 'Standard', 'height': 0.1})
-        msp.add_text(desc, dxfattribs={'insert': (x+0.1, y+0.1, 0), 'style': 'Standard', 'height': 0.1})
-
-
-def plot_elevation_profile(points: List[Tuple[int, float, float, float, str]], skipped_pairs: List[Tuple[int,int]]) -> List[Tuple[int, float, float]]:
-    # Ustal wysokość punktu pierwszego jako referencyjną dla każdej pary punktów w skipped_pairs
-    reference_elevation = points[0][3]
-    
-    # Inicjalizuj listę punktów referencyjnych, dodając punkt pierwszy na początku
-    reference_points = [points[0][0]]
-    reference_points.extend([pair[1] for pair in skipped_pairs])
-    # Oblicz różnice wysokości względem punktu referencyjnego
-    elevations = [point[3] - reference_elevation for point in points]
-
-    # Inicjalizuj listę odległości
-    distance_points = []
-
-    # Iteruj przez punkty, dodając 25 do distance_points dla każdej pary punktów z skipped_points
-    for i in range(1, len(points)):
-        if (points[i - 1][0], points[i][0]) in skipped_pairs:
-            distance_points.append(25)
-        else:
-            distance = math.sqrt((points[i][1] - points[i-1][1])**2 + (points[i][2] - points[i-1][2])**2)
-            distance_points.append(distance)
-
-    # Zsumuj odległości, aby uzyskać całkowite odległości
-    cumulative_distances = [0] + [sum(distance_points[:i]) for i in range(1, len(distance_points) + 1)]
-
-    # Zwróć punkty zawierające odległości, różnice wysokości i numery punktów
-    return list(zip([point[0] for point in points], cumulative_distances, elevations))
+    # Save DXF file
+    doc.saveas(output_dxf_path)
 
+    return skipped_pairs
 
-if __name__ == "__main__":
 
-    input_file_path = 'D:/ROBOTA/python/autocad/programy/test1.txt'
-    output_dxf_path = 'D:/ROBOTA/python/autocad/programy/test4.dxf'
+def add_profil(doc: Drawing, profile: ProfileArrays, offset_x: float, offset_y: float, points: List[Tuple[int, float, float, float, str]],
+               skipped_pairs: Union[Set[Tuple[int,int]], np.ndarray], plotted_pairs: Optional[Set[Tuple[int,int]]] = None,
+               label_mode: str = LABEL_TEXT, label_spacing: Optional[float] = None,
+               progress: Optional[Callable[[int], None]] = None) -> None:
+    # skipped_pairs: zbiór par numerów albo gotowa maska odcinków (mask[i] dotyczy odcinka i -> i+1)
+    # plotted_pairs: pary rysowane mimo obecności w skipped_pairs
+    if len(points) != len(profile):
+        raise ValueError(f"Liczba punktów ({len(points)}) nie zgadza się z profilem ({len(profile)})")
 
-    # Read coordinates
-    points = read_coordinates(input_file_path)
-    # Calculate offset based on the highest point on the left
+    msp = doc.modelspace()
+    xs = profile.distance + offset_x
+    ys = profile.elevation + offset_y
+
+    if isinstance(skipped_pairs, np.ndarray):
+        skipped = skipped_pairs.astype(bool, copy=False)
+    else:
+        skipped = skipped_pair_mask(profile.nr, skipped_pairs)
+    if plotted_pairs:
+        skipped = skipped & ~skipped_pair_mask(profile.nr, plotted_pairs)
+
+    # Odcinek rysujemy, gdy ma nie więcej niż 10 i nie jest na pominiętej parze
+    keep = (np.hypot(np.diff(xs), np.diff(ys)) <= 10) & ~skipped
+
+    # Ciągłe serie odcinków łączymy w jedną polilinię: seria [start, stop) odcinków ma wierzchołki start..stop
+    edges = np.diff(np.concatenate(([False], keep, [False])).astype(np.int8))
+    starts = np.flatnonzero(edges == 1)
+    stops = np.flatnonzero(edges == -1)
+    vertices = np.column_stack((xs, ys))
+    for start, stop in zip(starts.tolist(), stops.tolist()):
+        msp.add_lwpolyline(vertices[start:stop + 1].tolist(), dxfattribs={'layer': 'Profil_wysokosciowy'})
+
+    # Add profile vertices points with numbering and description
+    profile_points = ((nr, x, y, 0.0, point[4]) for nr, x, y, point in zip(profile.nr.tolist(), xs.tolist(), ys.tolist(), points))
+    add_labeled_points(doc, profile_points, layer='Profile_POiNT', mode=label_mode, label_spacing=label_spacing, label_z=False,
+                       progress=progress)
+
+
+def plot_elevation_profile(points: List[Tuple[int, float, float, float, str]], skipped_pairs: Set[Tuple[int,int]], gap: float = PROFILE_GAP) -> ProfileArrays:
+    n = len(points)
+    if n == 0:
+        return ProfileArrays(np.empty(0, dtype=np.int64), np.empty(0), np.empty(0))
+
+    nrs = nr_array(points)
+    xs = np.fromiter((p[1] for p in points), dtype=np.float64, count=n)
+    ys = np.fromiter((p[2] for p in points), dtype=np.float64, count=n)
+    zs = np.fromiter((p[3] for p in points), dtype=np.float64, count=n)
+
+    # Różnice wysokości względem pierwszego punktu
+    elevations = zs - zs[0]
+
+    # Odległości między kolejnymi punktami, na parach z skipped_pairs stała przerwa
+    distance_points = np.hypot(np.diff(xs), np.diff(ys))
+    distance_points[skipped_pair_mask(nrs, skipped_pairs)] = gap
+
+    # Odległości narastające
+    cumulative_distances = np.concatenate(([0.0], np.cumsum(distance_points)))
+
+    return ProfileArrays(nrs, cumulative_distances, elevations)
+
+
+def skipped_pair_mask(nrs: np.ndarray, skipped_pairs: Set[Tuple[int,int]]) -> np.ndarray:
+    # mask[i] == True gdy para (nrs[i], nrs[i+1]) jest w skipped_pairs
+    mask = np.zeros(max(len(nrs) - 1, 0), dtype=bool)
+    if not skipped_pairs or len(nrs) < 2:
+        return mask
+    if nrs.dtype == object:
+        # Identyfikatory alfanumeryczne - sprawdzamy każdą parę
+        values = nrs.tolist()
+        return np.fromiter((pair in skipped_pairs for pair in zip(values[:-1], values[1:])), dtype=bool, count=len(mask))
+    # Zawężamy kandydatów wektorowo, a dokładne sprawdzenie robimy tylko dla nich
+    second = np.fromiter((pair[1] for pair in skipped_pairs if type(pair[1]) is int), dtype=np.int64)
+    candidates = np.flatnonzero(np.isin(nrs[1:], second))
+    for i in candidates.tolist():
+        mask[i] = (int(nrs[i]), int(nrs[i + 1])) in skipped_pairs
+    return mask
+
+
+def calculate_profile_offset(points: List[Tuple[int, float, float, float, str]]) -> Tuple[float, float]:
     # Find point with the highest y coordinate and the smallest x coordinate
     highest_point = min(points, key=lambda p: p[1])
-    leftmost_point = max(points, key=lambda p: p[2])  # Fix: Changed from p[0] to p[2] to get the leftmost point
+    leftmost_point = max(points, key=lambda p: p[2])
 
     # Calculate offset based on the point with the highest y coordinate and the smallest x coordinate
-    offset_x, offset_y = leftmost_point[1] + 100, highest_point[2] + 50
+    return leftmost_point[1] + 100, highest_point[2] + 50
 
-    # Create DXF file with descriptions and get skipped_pairs
-    skipped_pairs = create_dxf_file(points, output_dxf_path, skipped_pairs=[])
 
-    # Generate plot and get points
-    plot_points = plot_elevation_profile(points, skipped_pairs)
+def create_profiles(points: List[Tuple[int, float, float, float, str]], output_dxf_path: Optional[str] = None,
+                    doc: Optional[Drawing] = None, gap: float = PROFILE_GAP, label_mode: str = LABEL_TEXT,
+                    label_spacing: Optional[float] = None, progress: Optional[Callable[[int], None]] = None) -> Drawing:
+    # Widok w planie i profil wysokościowy trafiają do jednego rysunku zapisywanego raz;
+    # bez output_dxf_path rysunek jest tylko zwracany, np. do dalszej obróbki w GUI.
+    # progress dostaje liczbę przetworzonych punktów z obu etapów (łącznie 2 * len(points))
+    if doc is None:
+        doc = new()
 
+    skipped_pairs = add_plan_view(doc, points, label_mode=label_mode, label_spacing=label_spacing, progress=progress)
+    if points:
+        profile = plot_elevation_profile(points, skipped_pairs, gap)
+        offset_x, offset_y = calculate_profile_offset(points)
+        profile_progress = None if progress is None else lambda done: progress(len(points) + done)
+        add_profil(doc, profile, offset_x, offset_y, points, skipped_pairs, label_mode=label_mode, label_spacing=label_spacing,
+                   progress=profile_progress)
 
-    # Read DXF file
-    doc = readfile(output_dxf_path)
+    if output_dxf_path is not None:
+        doc.saveas(output_dxf_path)
+    return doc
 
-    # Add elevation profiles to DXF file
-    add_profil(doc, plot_points, offset_x, offset_y, points, skipped_pairs)
 
+if __name__ == "__main__":
 
-    # Save modified DXF file
-    doc.saveas(output_dxf_path)
+    input_file_path = 'D:/ROBOTA/python/autocad/programy/test1.txt'
+    output_dxf_path = 'D:/ROBOTA/python/autocad/programy/test4.dxf'
+
+    # Read coordinates
+    errors = []
+    points = read_coordinates(input_file_path, errors)
+    if errors:
+        print(f"Pominięto {len(errors)} niepoprawnych linii:\n{format_malformed_lines(errors)}")
 
+    # Plan view and elevation profiles written to the DXF file in one pass
+    create_profiles(points, output_dxf_path)
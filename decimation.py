@@ -0,0 +1,118 @@
+import numpy as np
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+from coordinates import Point
+from point_labels import LABEL_BLOCK, LABEL_MTEXT, LABEL_NONE, LABEL_TEXT
+
+# Przerzedzanie gęstych pomiarów przed eksportem:
+#  - siatka: w każdym oczku (osobno dla każdego kodu) zostają punkty o najniższej i najwyższej wysokości,
+#  - Douglas-Peucker: z polilinii usuwamy wierzchołki odległe od uproszczonej linii o mniej niż tolerancja.
+
+
+# Do szacowania oszczędności: encje na punkt w każdym trybie opisu (INSERT liczony z dwoma ATTRIB)
+# i bajty jednego wierzchołka LWPOLYLINE w DXF (kody 10 i 20 ze współrzędnymi geodezyjnymi)
+ENTITIES_PER_POINT = {LABEL_TEXT: 3, LABEL_BLOCK: 3, LABEL_MTEXT: 2, LABEL_NONE: 1}
+VERTEX_BYTES = 38
+
+
+class DecimationReport(NamedTuple):
+    points_before: int
+    points_after: int
+    vertices_before: int
+    vertices_after: int
+
+    @property
+    def points_removed(self) -> int:
+        return self.points_before - self.points_after
+
+    @property
+    def vertices_removed(self) -> int:
+        return self.vertices_before - self.vertices_after
+
+
+def grid_decimate(xs: np.ndarray, ys: np.ndarray, zs: np.ndarray, cell: float,
+                  groups: Optional[np.ndarray] = None) -> np.ndarray:
+    # Indeksy zachowanych punktów (rosnąco): minimum i maksimum wysokości w każdym oczku i grupie
+    if cell <= 0:
+        raise ValueError("Bok oczka siatki musi być dodatni")
+    if len(xs) == 0:
+        return np.empty(0, dtype=np.int64)
+    cx = np.floor((xs - xs.min()) / cell).astype(np.int64)
+    cy = np.floor((ys - ys.min()) / cell).astype(np.int64)
+    keys = cx * (int(cy.max()) + 1) + cy
+    if groups is not None:
+        keys = keys * (int(groups.max()) + 1) + groups
+
+    order = np.lexsort((zs, keys))
+    sorted_keys = keys[order]
+    first = np.flatnonzero(np.concatenate(([True], sorted_keys[1:] != sorted_keys[:-1])))
+    last = np.concatenate((first[1:], [len(order)])) - 1
+    return np.unique(np.concatenate((order[first], order[last])))
+
+
+def decimate_points(points: List[Point], cell: float) -> List[Point]:
+    # Kolejność punktów zachowana; kody grupujemy osobno, żeby nie gubić obiektów o innym kodzie
+    if not points:
+        return []
+    xs = np.fromiter((p[1] for p in points), dtype=np.float64, count=len(points))
+    ys = np.fromiter((p[2] for p in points), dtype=np.float64, count=len(points))
+    zs = np.fromiter((p[3] for p in points), dtype=np.float64, count=len(points))
+    codes = {}
+    groups = np.fromiter((codes.setdefault(p[4], len(codes)) for p in points), dtype=np.int64, count=len(points))
+    return [points[i] for i in grid_decimate(xs, ys, zs, cell, groups).tolist()]
+
+
+def douglas_peucker(vertices: np.ndarray, tolerance: float) -> np.ndarray:
+    # Maska zachowanych wierzchołków; rekurencja zastąpiona stosem, odległości liczone wektorowo dla całego odcinka
+    n = len(vertices)
+    keep = np.zeros(n, dtype=bool)
+    if n == 0:
+        return keep
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        ax, ay = vertices[start]
+        dx, dy = vertices[end] - vertices[start]
+        inner = vertices[start + 1:end]
+        length = np.hypot(dx, dy)
+        if length == 0:
+            # Polilinia zamknięta - odległość od punktu początkowego
+            distance = np.hypot(inner[:, 0] - ax, inner[:, 1] - ay)
+        else:
+            distance = np.abs(dx * (inner[:, 1] - ay) - dy * (inner[:, 0] - ax)) / length
+        k = int(distance.argmax())
+        if distance[k] > tolerance:
+            split = start + 1 + k
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+    return keep
+
+
+def simplify_polylines(polylines: Sequence[Sequence[Tuple[float, float]]],
+                       tolerance: float) -> Tuple[List[List[Tuple[float, float]]], DecimationReport]:
+    if tolerance < 0:
+        raise ValueError("Tolerancja upraszczania nie może być ujemna")
+    simplified = []
+    before = after = 0
+    for polyline in polylines:
+        before += len(polyline)
+        if len(polyline) > 2:
+            vertices = np.asarray(polyline, dtype=np.float64)
+            polyline = vertices[douglas_peucker(vertices, tolerance)].tolist()
+        simplified.append([tuple(v) for v in polyline])
+        after += len(polyline)
+    return simplified, DecimationReport(0, 0, before, after)
+
+
+def estimate_savings(report: DecimationReport, label_mode: str, output_bytes: int, base_bytes: int = 0) -> Tuple[int, int]:
+    # Szacunek (encje, bajty) zaoszczędzonych przez przerzedzenie. Rozmiar punktu z opisami liczymy z zapisanego
+    # pliku: bez nagłówka pustego rysunku (base_bytes) i wierzchołków polilinii, podzielone przez liczbę punktów.
+    # Przy label_spacing część punktów i tak nie ma opisu, więc liczba encji jest górnym oszacowaniem.
+    entities = report.points_removed * ENTITIES_PER_POINT[label_mode]
+    points_bytes = max(output_bytes - base_bytes - report.vertices_after * VERTEX_BYTES, 0)
+    point_bytes = points_bytes / report.points_after if report.points_after else 0
+    return entities, int(report.points_removed * point_bytes + report.vertices_removed * VERTEX_BYTES)
@@ -0,0 +1,203 @@
+import io
+import os
+import numpy as np
+import ezdxf.lldxf.encoding  # rejestruje obsługę błędów 'dxfreplace' (znaki spoza cp1252 jako \U+XXXX)
+from ezdxf.addons.r12writer import R12FastStreamWriter
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from coordinates import DEFAULT_CHUNK_SIZE, ColumnMap, CoordinateArrays, iter_coordinate_chunks
+from decimation import DecimationReport, grid_decimate
+from point_labels import LABEL_BLOCK, LABEL_NONE, LABEL_TEXT, add_labeled_points
+
+# Zapis strumieniowy: encje trafiają do pliku DXF R12 od razu po utworzeniu, w pamięci nie ma całego modelspace.
+# R12 nie zna LWPOLYLINE ani MTEXT - zapisujemy je jako POLYLINE 2D i jednowierszowy TEXT o tej samej geometrii.
+# Duży plik można rysować w kilku procesach: każdy zapisuje swoją porcję punktów do tekstu DXF w pamięci,
+# a proces główny dopisuje porcje do pliku w kolejności numerów.
+PARALLEL_CHUNK_SIZE = 50_000    # punkty w jednym zadaniu procesu roboczego
+BLOCK_LABELS_ERROR = "Zapis strumieniowy (DXF R12) nie obsługuje opisów w blokach"
+
+
+class StreamingModelspace:
+    def __init__(self, writer: R12FastStreamWriter):
+        self.writer = writer
+        self.entity_count = 0
+        self.layer_counts = Counter()
+
+    def _added(self, layer: str) -> None:
+        self.entity_count += 1
+        self.layer_counts[layer] += 1
+
+    def add_point(self, location: Sequence[float], dxfattribs: Optional[dict] = None) -> None:
+        dxfattribs = dxfattribs or {}
+        self.writer.add_point(location, layer=dxfattribs.get('layer', '0'))
+        self._added(dxfattribs.get('layer', '0'))
+
+    def add_text(self, text: str, dxfattribs: Optional[dict] = None) -> None:
+        dxfattribs = dxfattribs or {}
+        self.writer.add_text(text, insert=dxfattribs.get('insert', (0, 0)), height=dxfattribs.get('height', 1.0),
+                             style=dxfattribs.get('style', 'STANDARD').upper(), layer=dxfattribs.get('layer', '0'))
+        self._added(dxfattribs.get('layer', '0'))
+
+    def add_mtext(self, text: str, dxfattribs: Optional[dict] = None) -> None:
+        dxfattribs = dict(dxfattribs or {})
+        dxfattribs['height'] = dxfattribs.pop('char_height', 1.0)
+        self.add_text(text, dxfattribs)
+
+    def add_lwpolyline(self, points: Iterable[Sequence[float]], dxfattribs: Optional[dict] = None) -> None:
+        dxfattribs = dxfattribs or {}
+        self.writer.add_polyline_2d([(p[0], p[1]) for p in points], layer=dxfattribs.get('layer', '0'))
+        self._added(dxfattribs.get('layer', '0'))
+
+
+class StreamingDrawing:
+    # Zamiennik Drawing dla funkcji rysujących (create_points, connect_points_with_lwpolyline,
+    # add_plan_view, add_profil, create_profiles) - obsługuje tylko modelspace(), bez bloków.
+    # Zapis do pliku tymczasowego i zamiana nazwy po udanym zamknięciu - po błędzie w trakcie rysowania
+    # pod ścieżką wynikową nie zostaje ucięty plik z poprawnym końcem (wzięty potem za gotowy wynik).
+    def __init__(self, output_dxf_path: str):
+        self.output_dxf_path = output_dxf_path
+        self._tmp_path = f'{output_dxf_path}.{os.getpid()}.tmp'
+        self._stream = open(self._tmp_path, 'wt', encoding='cp1252', errors='dxfreplace')
+        self._writer = R12FastStreamWriter(self._stream)
+        self._msp = StreamingModelspace(self._writer)
+
+    def modelspace(self) -> StreamingModelspace:
+        return self._msp
+
+    @property
+    def blocks(self):
+        raise ValueError(BLOCK_LABELS_ERROR)
+
+    def close(self) -> None:
+        if self._stream.closed:
+            return
+        self._writer.close()
+        self._stream.close()
+        if self._tmp_path is not None:
+            os.replace(self._tmp_path, self.output_dxf_path)
+
+    def discard(self) -> None:
+        # Przerwany zapis: bez końca pliku, plik tymczasowy usuwamy
+        if self._stream.closed:
+            return
+        self._stream.close()
+        if self._tmp_path is not None:
+            try:
+                os.remove(self._tmp_path)
+            except OSError:
+                pass
+
+    def write_fragment(self, entities: str, layer_counts: Counter) -> None:
+        # Gotowe encje z FragmentDrawing dopisane do sekcji ENTITIES
+        self._stream.write(entities)
+        self._msp.entity_count += sum(layer_counts.values())
+        self._msp.layer_counts.update(layer_counts)
+
+    def __enter__(self) -> 'StreamingDrawing':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if exc[0] is not None:
+            self.discard()
+        else:
+            self.close()
+
+
+class FragmentDrawing(StreamingDrawing):
+    # Encje zapisywane do bufora w pamięci, bez nagłówka i końca pliku - porcja dla StreamingDrawing.write_fragment
+    def __init__(self):
+        self.output_dxf_path = self._tmp_path = None
+        self._stream = io.StringIO()
+        self._writer = R12FastStreamWriter(self._stream)
+        self._start = self._stream.tell()   # konstruktor zapisał już nagłówek sekcji ENTITIES
+        self._msp = StreamingModelspace(self._writer)
+
+    def fragment(self) -> str:
+        return self._stream.getvalue()[self._start:]
+
+
+def render_points_chunk(nrs: np.ndarray, xs: np.ndarray, ys: np.ndarray, zs: np.ndarray, codes: np.ndarray,
+                        code_names: List[str], label_mode: str, label_spacing: Optional[float],
+                        labeled_cells: Set[Tuple[int, int]]) -> Tuple[str, Counter]:
+    # Uruchamiane w procesie roboczym; labeled_cells - oczka z opisem w poprzednich porcjach
+    doc = FragmentDrawing()
+    points = zip(nrs.tolist(), xs.tolist(), ys.tolist(), zs.tolist(), [code_names[c] for c in codes.tolist()])
+    add_labeled_points(doc, points, mode=label_mode, label_spacing=label_spacing, labeled_cells=labeled_cells)
+    return doc.fragment(), doc.modelspace().layer_counts
+
+
+def create_points_parallel(arrays: CoordinateArrays, doc: StreamingDrawing, label_mode: str = LABEL_TEXT,
+                           label_spacing: Optional[float] = None, decimate_cell: Optional[float] = None,
+                           workers: Optional[int] = None, chunk_size: int = PARALLEL_CHUNK_SIZE,
+                           progress: Optional[Callable[[int], None]] = None) -> DecimationReport:
+    # Wynik taki sam jak create_points na StreamingDrawing: punkty w kolejności numerów, te same warstwy i opisy
+    if label_mode == LABEL_BLOCK:
+        raise ValueError(BLOCK_LABELS_ERROR)
+    order = arrays.nr_order()
+    xs, ys, zs = np.asarray(arrays.x)[order], np.asarray(arrays.y)[order], np.asarray(arrays.z)[order]
+    codes = np.asarray(arrays.code)[order]
+    if decimate_cell:
+        kept = grid_decimate(xs, ys, zs, decimate_cell, codes)
+        order, xs, ys, zs, codes = order[kept], xs[kept], ys[kept], zs[kept], codes[kept]
+    n = len(order)
+
+    # Przerzedzanie opisów zależy od kolejności: opis dostaje pierwszy punkt w oczku. Dla każdej porcji
+    # wyznaczamy oczka, których pierwszy punkt leży we wcześniejszej porcji - porcja zaczyna z nimi jako zajętymi.
+    first_in_cell = cells = None
+    if label_spacing and label_mode != LABEL_NONE:
+        cells = (np.floor_divide(xs, label_spacing).astype(np.int64), np.floor_divide(ys, label_spacing).astype(np.int64))
+        keys = (cells[0] - cells[0].min()) * (int(cells[1].max() - cells[1].min()) + 1) + (cells[1] - cells[1].min())
+        _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        first_in_cell = first[inverse]
+
+    def tasks() -> Iterator[tuple]:
+        for lo in range(0, n, chunk_size):
+            hi = min(lo + chunk_size, n)
+            labeled_cells = set()
+            if first_in_cell is not None:
+                earlier = np.flatnonzero(first_in_cell[lo:hi] < lo) + lo
+                labeled_cells = set(zip(cells[0][earlier].tolist(), cells[1][earlier].tolist()))
+            yield (arrays.point_nrs(order[lo:hi]), xs[lo:hi], ys[lo:hi], zs[lo:hi], codes[lo:hi], arrays.code_names,
+                   label_mode, label_spacing, labeled_cells)
+
+    done = 0
+
+    def write(result: Tuple[str, Counter]) -> None:
+        nonlocal done
+        doc.write_fragment(*result)
+        done = min(done + chunk_size, n)
+        if progress is not None:
+            progress(done)
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or n <= chunk_size:
+        for args in tasks():
+            write(render_points_chunk(*args))
+    else:
+        # Najwyżej dwie porcje na proces w toku - gotowe porcje czekające na zapis nie zajmują całej pamięci
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            for args in tasks():
+                pending.append(executor.submit(render_points_chunk, *args))
+                if len(pending) >= 2 * workers:
+                    write(pending.popleft().result())
+            while pending:
+                write(pending.popleft().result())
+    return DecimationReport(len(arrays), n, 0, 0)
+
+
+def stream_points(input_path: str, output_dxf_path: str, label_mode: str = LABEL_TEXT, label_spacing: Optional[float] = None,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE, errors: Optional[list] = None, file_format: Optional[str] = None,
+                  columns: Optional[ColumnMap] = None) -> int:
+    # Odpowiednik create_points o stałym zużyciu pamięci: plik czytany porcjami, punkty w kolejności z pliku
+    if label_mode == LABEL_BLOCK:
+        raise ValueError(BLOCK_LABELS_ERROR)
+    count = 0
+    labeled_cells = set()
+    with StreamingDrawing(output_dxf_path) as doc:
+        for chunk in iter_coordinate_chunks(input_path, chunk_size, errors, file_format, columns):
+            add_labeled_points(doc, chunk, mode=label_mode, label_spacing=label_spacing, labeled_cells=labeled_cells)
+            count += len(chunk)
+    return count
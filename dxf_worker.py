@@ -0,0 +1,46 @@
+from PySide6.QtCore import QObject, QRunnable, Signal
+from typing import Any, Callable
+
+# Zadanie dostaje funkcję progress(przetworzone, wszystkie) i zwraca wynik (np. Drawing)
+Job = Callable[[Callable[[int, int], None]], Any]
+
+
+class Cancelled(Exception):
+    pass
+
+
+class WorkerSignals(QObject):
+    progress = Signal(int, int)
+    finished = Signal(object)
+    failed = Signal(str)
+    cancelled = Signal()
+
+
+class DxfWorker(QRunnable):
+    def __init__(self, job: Job):
+        super().__init__()
+        self.job = job
+        self.signals = WorkerSignals()
+        self._cancelled = False
+
+    def cancel(self) -> None:
+        self._cancelled = True
+
+    def report_progress(self, done: int, total: int) -> None:
+        # Wywoływane z wnętrza zadania - tu przerywamy pracę po anulowaniu
+        if self._cancelled:
+            raise Cancelled()
+        self.signals.progress.emit(done, total)
+
+    def run(self) -> None:
+        try:
+            result = self.job(self.report_progress)
+        except Cancelled:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+        else:
+            if self._cancelled:
+                self.signals.cancelled.emit()
+            else:
+                self.signals.finished.emit(result)
@@ -0,0 +1,209 @@
+from ezdxf.document import Drawing
+from ezdxf.filemanagement import readfile
+from typing import Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from connect_points import CONNECT_LAYER
+from coordinates import format_malformed_lines, read_coordinates, sort_by_nr
+from point_labels import CODE_OFFSET, LABEL_TEXT, NR_OFFSET, POINT_BLOCK, add_labeled_points
+from survey_formats import Point, PointNr, nr_position, point_nr
+
+# Aktualizacja istniejącego rysunku o nowe lub zmienione punkty. Numer punktu odczytujemy z jego opisu
+# (TEXT/MTEXT w miejscu numeru albo atrybut NR bloku PUNKT). Punkty bez opisu (tryb none, przerzedzanie
+# opisów) rozpoznajemy tylko po położeniu - taki punkt przesunięty w nowym pomiarze zostanie dodany obok starego.
+
+KEY_PRECISION = 1000  # położenia porównywane z dokładnością do 1 mm
+
+
+class IndexedPoint(NamedTuple):
+    location: Tuple[float, float, float]
+    code: Optional[str]
+    entities: list          # POINT/INSERT i jego opisy - usuwane razem przy zmianie punktu
+
+
+class PointIndex(NamedTuple):
+    numbered: Dict[PointNr, IndexedPoint]
+    unnumbered: Set[Tuple[int, int, int]]             # klucze położeń punktów bez opisu
+    labeled_cells: Set[Tuple[int, int]]
+
+
+class UpdateSummary(NamedTuple):
+    added: int
+    changed: int
+    unchanged: int
+
+
+def location_key(x: float, y: float, z: float = 0.0) -> Tuple[int, int, int]:
+    return round(x * KEY_PRECISION), round(y * KEY_PRECISION), round(z * KEY_PRECISION)
+
+
+def index_points(doc: Drawing, layer: str = 'POINTS', label_spacing: Optional[float] = None) -> PointIndex:
+    # Jedno przejście po modelspace; opisy dopasowujemy do punktów po przesunięciu NR_OFFSET/CODE_OFFSET
+    msp = doc.modelspace()
+    points_xy: Dict[Tuple[int, int], object] = {}
+    numbered: Dict[PointNr, IndexedPoint] = {}
+    texts = []
+
+    for entity in msp:
+        dxftype = entity.dxftype()
+        if dxftype == 'POINT' and entity.dxf.layer == layer:
+            x, y, z = entity.dxf.location
+            points_xy[location_key(x, y)[:2]] = entity
+        elif dxftype == 'INSERT' and entity.dxf.layer == layer and entity.dxf.name == POINT_BLOCK:
+            nr = _parse_nr(entity.get_attrib_text('NR'))
+            if nr is not None:
+                numbered[nr] = IndexedPoint(tuple(entity.dxf.insert), entity.get_attrib_text('KOD'), [entity])
+        elif dxftype in ('TEXT', 'MTEXT'):
+            texts.append(entity)
+
+    nr_dx, nr_dy, _ = NR_OFFSET
+    code_dx, code_dy, _ = CODE_OFFSET
+    codes = {}
+    for text in texts:
+        x, y, _ = text.dxf.insert
+        if text.dxftype() == 'MTEXT':
+            nr, _, code = text.plain_text().partition(' ')
+            point = points_xy.get(location_key(x - nr_dx, y - nr_dy)[:2])
+            nr = _parse_nr(nr)
+            if point is not None and nr is not None:
+                numbered[nr] = IndexedPoint(tuple(point.dxf.location), code, [point, text])
+            continue
+        point = points_xy.get(location_key(x - nr_dx, y - nr_dy)[:2])
+        nr = _parse_nr(text.dxf.text) if point is not None else None
+        if nr is not None:
+            numbered[nr] = IndexedPoint(tuple(point.dxf.location), None, [point, text])
+            continue
+        point = points_xy.get(location_key(x - code_dx, y - code_dy)[:2])
+        if point is not None:
+            codes[id(point)] = (text.dxf.text, text)
+
+    for nr, indexed in numbered.items():
+        point = indexed.entities[0]
+        if id(point) in codes:
+            code, text = codes[id(point)]
+            numbered[nr] = IndexedPoint(indexed.location, code, indexed.entities + [text])
+
+    labeled = {id(indexed.entities[0]) for indexed in numbered.values()}
+    unnumbered = {location_key(*point.dxf.location) for point in points_xy.values() if id(point) not in labeled}
+    labeled_cells = set()
+    if label_spacing:
+        labeled_cells = {(int(p.location[0] // label_spacing), int(p.location[1] // label_spacing)) for p in numbered.values()}
+    return PointIndex(numbered, unnumbered, labeled_cells)
+
+
+def update_points(doc: Drawing, points: List[Point], label_mode: str = LABEL_TEXT, label_spacing: Optional[float] = None,
+                  connect: bool = False, progress: Optional[Callable[[int], None]] = None) -> UpdateSummary:
+    index = index_points(doc, label_spacing=label_spacing)
+    msp = doc.modelspace()
+
+    new_points, moved = [], {}
+    unchanged = changed = 0
+    for point in sort_by_nr(points):
+        nr, x, y, z, desc = point
+        existing = index.numbered.get(nr)
+        if existing is None:
+            if location_key(x, y, z) in index.unnumbered:
+                unchanged += 1
+            else:
+                new_points.append(point)
+            continue
+        if location_key(*existing.location) == location_key(x, y, z) and existing.code in (None, desc):
+            unchanged += 1
+            continue
+        # Zmieniony punkt: usuwamy stary punkt z opisami i rysujemy go od nowa
+        for entity in existing.entities:
+            msp.delete_entity(entity)
+        moved[location_key(*existing.location)[:2]] = (x, y)
+        new_points.append(point)
+        changed += 1
+
+    if connect:
+        all_points = {nr: (p.location[0], p.location[1], p.code) for nr, p in index.numbered.items()}
+        # Położenia z wczytanego pliku mają pierwszeństwo - znamy też punkty bez opisu w rysunku
+        all_points.update((p[0], (p[1], p[2], p[4])) for p in points)
+        extend_polylines(doc, new_points, all_points, moved)
+
+    add_labeled_points(doc, new_points, mode=label_mode, label_spacing=label_spacing, progress=progress,
+                       labeled_cells=index.labeled_cells)
+    return UpdateSummary(len(new_points) - changed, changed, unchanged)
+
+
+def extend_polylines(doc: Drawing, new_points: List[Point], all_points: Dict[PointNr, Tuple[float, float, Optional[str]]],
+                     moved: Dict[Tuple[int, int], Tuple[float, float]]) -> None:
+    # Tryb sequence z connect_points: kolejne numery o tym samym kodzie tworzą polilinię.
+    # Nowy punkt dopisujemy na koniec polilinii kończącej się w punkcie nr - 1 albo na początek
+    # polilinii zaczynającej się w nr + 1 (P11 i P13 dla P12); przesunięte punkty przesuwają swój wierzchołek.
+    msp = doc.modelspace()
+    by_end: Dict[Tuple[int, int], object] = {}
+    by_start: Dict[Tuple[int, int], object] = {}
+    vertex_keys = set()
+    for polyline in msp.query(f'LWPOLYLINE[layer=="{CONNECT_LAYER}"]'):
+        vertices = polyline.get_points('xy')
+        if moved and any(location_key(x, y)[:2] in moved for x, y in vertices):
+            vertices = [moved.get(location_key(x, y)[:2], (x, y)) for x, y in vertices]
+            polyline.set_points(vertices, format='xy')
+        by_end[location_key(*vertices[-1])[:2]] = polyline
+        by_start[location_key(*vertices[0])[:2]] = polyline
+        vertex_keys.update(location_key(x, y)[:2] for x, y in vertices)
+
+    # Numery sąsiadów szukamy po pozycji w serii (przedrostek, liczba), więc P9 sąsiaduje z P10 i z P010
+    by_position = {nr_position(nr): nr for nr in all_points}
+
+    def neighbour_key(nr: PointNr, step: int) -> Optional[Tuple[int, int]]:
+        # Klucz położenia sąsiedniego numeru, jeśli ma ten sam kod (kod nieznany traktujemy jak zgodny)
+        position = nr_position(nr)
+        other = by_position.get((position[0], position[1] + step)) if position is not None else None
+        if other is None:
+            return None
+        code, other_code = all_points[nr][2], all_points[other][2]
+        if code is not None and other_code is not None and code != other_code:
+            return None
+        return location_key(*all_points[other][:2])[:2]
+
+    for nr, x, y, z, desc in new_points:
+        key = location_key(x, y)[:2]
+        if key in vertex_keys:
+            # Punkt zmieniony tylko w opisie albo już przesunięty w polilinii - wierzchołek już jest
+            continue
+        before = by_end.pop(neighbour_key(nr, -1), None)
+        after = by_start.pop(neighbour_key(nr, 1), None)
+        if before is not None and after is not None and before is not after:
+            # Punkt łączy dwie polilinie w jedną
+            before.set_points(before.get_points('xy') + [(x, y)] + after.get_points('xy'), format='xy')
+            by_end[location_key(*after.get_points('xy')[-1])[:2]] = before
+            msp.delete_entity(after)
+        elif before is not None:
+            before.append((x, y), format='xy')
+            by_end[key] = before
+        elif after is not None:
+            after.set_points([(x, y)] + after.get_points('xy'), format='xy')
+            by_start[key] = after
+        else:
+            polyline = msp.add_lwpolyline([(x, y)], dxfattribs={'layer': CONNECT_LAYER})
+            by_end[key] = by_start[key] = polyline
+
+
+def update_dxf_file(points: List[Point], dxf_path: str, output_dxf_path: Optional[str] = None, label_mode: str = LABEL_TEXT,
+                    label_spacing: Optional[float] = None, connect: bool = False) -> UpdateSummary:
+    doc = readfile(dxf_path)
+    summary = update_points(doc, points, label_mode=label_mode, label_spacing=label_spacing, connect=connect)
+    if summary.added or summary.changed or (output_dxf_path and output_dxf_path != dxf_path):
+        doc.saveas(output_dxf_path or dxf_path)
+    return summary
+
+
+def _parse_nr(text: Optional[str]) -> Optional[PointNr]:
+    # Numer z opisu tak jak z pliku: same cyfry jako liczba, inne identyfikatory jako tekst
+    return point_nr(text) if text else None
+
+
+if __name__ == "__main__":
+    input_file_path = 'D:/ROBOTA/GEOPARTNER/dom/GRAN TG.txt'
+    dxf_path = 'D:/ROBOTA/GEOPARTNER/dom/gran_tg.dxf'
+
+    errors = []
+    points = read_coordinates(input_file_path, errors)
+    if errors:
+        print(f"Pominięto {len(errors)} niepoprawnych linii:\n{format_malformed_lines(errors)}")
+
+    summary = update_dxf_file(points, dxf_path, connect=True)
+    print(f"Dodano {summary.added}, zmieniono {summary.changed}, bez zmian {summary.unchanged}")
@@ -0,0 +1,95 @@
+import cProfile
+import json
+import os
+import platform
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, Optional
+
+# Pomiar jednego przebiegu: czasy etapów (wczytanie, rysowanie, zapis) i liczniki (linie, encje na warstwach,
+# bajty). Wynik trafia do podsumowania w CLI/GUI i jako jedna linia JSON do dziennika przebiegów.
+PROFILE_ENV = 'CAD_TOOLS_PROFILE'   # katalog na zrzuty cProfile, gdy ustawiony
+
+
+def default_log_path() -> str:
+    path = os.environ.get('CAD_TOOLS_LOG')
+    if path:
+        return path
+    return os.path.join(os.environ.get('LOCALAPPDATA') or os.path.expanduser('~/.cache'), 'cad_tools', 'runs.jsonl')
+
+
+def profile_path_for(name: str, profile_dir: Optional[str] = None) -> Optional[str]:
+    # Ścieżka zrzutu cProfile w profile_dir (domyślnie z CAD_TOOLS_PROFILE); None - bez profilowania
+    profile_dir = profile_dir or os.environ.get(PROFILE_ENV)
+    if not profile_dir:
+        return None
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    return os.path.join(profile_dir, f'{name}-{stamp}.prof')
+
+
+class Instrumentation:
+    def __init__(self, operation: str, input_path: Optional[str] = None, profile_path: Optional[str] = None):
+        self.operation = operation
+        self.input_path = input_path
+        self.started = datetime.now()
+        self.stages: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+        self.profile_path = profile_path
+        self._profiler = cProfile.Profile() if profile_path else None
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        # Etapy o tej samej nazwie sumują się; profiler działa tylko wewnątrz etapów (w wątku, który je wykonuje)
+        if self._profiler is not None:
+            self._profiler.enable()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+            if self._profiler is not None:
+                self._profiler.disable()
+
+    def count(self, name: str, value: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def count_entities(self, doc) -> None:
+        # Encje na warstwach; rysunek strumieniowy zlicza je sam w trakcie zapisu
+        msp = doc.modelspace()
+        layers = getattr(msp, 'layer_counts', None)
+        if layers is None:
+            layers = Counter(entity.dxf.layer for entity in msp)
+        for layer, count in layers.items():
+            self.count(f'entities.{layer}', count)
+
+    def count_file(self, path: str) -> None:
+        self.count('bytes_written', os.path.getsize(path))
+
+    def finish(self) -> None:
+        if self._profiler is not None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.profile_path)), exist_ok=True)
+            self._profiler.dump_stats(self.profile_path)
+            self._profiler = None
+
+    def to_dict(self) -> dict:
+        return {'time': self.started.isoformat(timespec='seconds'), 'host': platform.node(), 'operation': self.operation,
+                'input': self.input_path, 'stages': self.stages, 'counters': self.counters,
+                'seconds': sum(self.stages.values()), 'profile': self.profile_path}
+
+    def summary(self) -> str:
+        lines = [f"{name}: {seconds:.3f} s" for name, seconds in self.stages.items()]
+        lines.append(f"razem: {sum(self.stages.values()):.3f} s")
+        lines.extend(f"{name}: {value:,}" for name, value in sorted(self.counters.items()))
+        if self.profile_path:
+            lines.append(f"profil: {self.profile_path}")
+        return '\n'.join(lines)
+
+
+def append_log(record: dict, log_path: Optional[str] = None) -> None:
+    # Dziennik JSON Lines - jedna linia na przebieg, łatwy do zebrania ze stanowisk
+    log_path = log_path or default_log_path()
+    os.makedirs(os.path.dirname(os.path.abspath(log_path)), exist_ok=True)
+    with open(log_path, 'a', encoding='utf-8') as stream:
+        stream.write(json.dumps(record, ensure_ascii=False) + '\n')
@@ -0,0 +1,86 @@
+from typing import TYPE_CHECKING, Callable, Iterable, Optional, Set, Tuple
+
+if TYPE_CHECKING:
+    # Tylko do adnotacji - stałe trybów opisu importuje okno programu bez ładowania ezdxf
+    from ezdxf.document import Drawing
+
+# Tryby opisu punktów
+LABEL_TEXT = 'text'     # POINT + dwa osobne TEXT (numer i kod)
+LABEL_BLOCK = 'block'   # jeden blok PUNKT z atrybutami NR i KOD wstawiany dla każdego punktu
+LABEL_MTEXT = 'mtext'   # POINT + jeden MTEXT "numer kod"
+LABEL_NONE = 'none'     # tylko POINT, bez opisów
+LABEL_MODES = (LABEL_TEXT, LABEL_BLOCK, LABEL_MTEXT, LABEL_NONE)
+
+POINT_BLOCK = 'PUNKT'
+TEXT_HEIGHT = 0.1
+PROGRESS_STEP = 1000  # co ile punktów wywoływany jest progress
+
+# Przesunięcia opisów względem punktu, takie same jak w dotychczasowych TEXT
+NR_OFFSET = (-0.4, 0.1, 0.2)
+CODE_OFFSET = (0.1, 0.1, 0.2)
+
+
+def define_point_block(doc: 'Drawing') -> str:
+    if POINT_BLOCK in doc.blocks:
+        return POINT_BLOCK
+    block = doc.blocks.new(name=POINT_BLOCK)
+    # Punkt na warstwie 0 przejmuje warstwę wstawienia bloku
+    block.add_point((0, 0, 0), dxfattribs={'layer': '0'})
+    block.add_attdef('NR', insert=NR_OFFSET, dxfattribs={'style': 'Standard', 'height': TEXT_HEIGHT})
+    block.add_attdef('KOD', insert=CODE_OFFSET, dxfattribs={'style': 'Standard', 'height': TEXT_HEIGHT})
+    return POINT_BLOCK
+
+
+def add_labeled_points(doc: 'Drawing', points: Iterable[Tuple[int, float, float, float, str]], layer: str = 'POINTS',
+                       mode: str = LABEL_TEXT, label_spacing: Optional[float] = None, label_z: bool = True,
+                       progress: Optional[Callable[[int], None]] = None, labeled_cells: Optional[Set[Tuple[int, int]]] = None) -> None:
+    # label_spacing: opis tylko dla pierwszego punktu w każdym oczku siatki o tym boku;
+    # labeled_cells pozwala dzielić zajęte oczka między kolejnymi wywołaniami (zapis porcjami)
+    # label_z: opisy na wysokości punktu + 0.2; False kładzie je na z=0 (profil)
+    # progress: wywoływane z liczbą przetworzonych punktów co PROGRESS_STEP punktów i na końcu
+    if mode not in LABEL_MODES:
+        raise ValueError(f"Nieznany tryb opisu punktów: {mode}")
+    msp = doc.modelspace()
+    if mode == LABEL_BLOCK:
+        define_point_block(doc)
+
+    if labeled_cells is None:
+        labeled_cells = set()
+    nr_dx, nr_dy, text_dz = NR_OFFSET
+    code_dx, code_dy, _ = CODE_OFFSET
+    point_attribs = {'layer': layer}
+    text_attribs = {'style': 'Standard', 'height': TEXT_HEIGHT}
+
+    done = 0
+    for nr, x, y, z, desc in points:
+        done += 1
+        if progress is not None and done % PROGRESS_STEP == 0:
+            progress(done)
+        label = mode != LABEL_NONE
+        if label and label_spacing:
+            cell = (int(x // label_spacing), int(y // label_spacing))
+            label = cell not in labeled_cells
+            labeled_cells.add(cell)
+        tz = z + text_dz if label_z else 0
+
+        if mode == LABEL_BLOCK:
+            if not label:
+                msp.add_point(location=(x, y, z), dxfattribs=point_attribs)
+                continue
+            ref = msp.add_blockref(POINT_BLOCK, (x, y, z), dxfattribs=point_attribs)
+            ref.add_attrib('NR', f'{nr}', insert=(x + nr_dx, y + nr_dy, tz), dxfattribs=text_attribs)
+            ref.add_attrib('KOD', desc, insert=(x + code_dx, y + code_dy, tz), dxfattribs=text_attribs)
+            continue
+
+        msp.add_point(location=(x, y, z), dxfattribs=point_attribs)
+        if not label:
+            continue
+        if mode == LABEL_TEXT:
+            msp.add_text(f'{nr}', dxfattribs={'insert': (x + nr_dx, y + nr_dy, tz), **text_attribs})
+            msp.add_text(desc, dxfattribs={'insert': (x + code_dx, y + code_dy, tz), **text_attribs})
+        else:
+            msp.add_mtext(f'{nr} {desc}', dxfattribs={'insert': (x + nr_dx, y + nr_dy, tz), 'style': 'Standard',
+                                                      'char_height': TEXT_HEIGHT})
+
+    if progress is not None:
+        progress(done)
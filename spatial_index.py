@@ -0,0 +1,130 @@
+import math
+import numpy as np
+from collections import deque
+from typing import Dict, List, Optional, Set, Tuple
+
+POINTS_PER_CELL = 2     # średnia liczba punktów w oczku przy doborze boku do gęstości chmury
+
+
+def density_cell_size(xs: np.ndarray, ys: np.ndarray, max_size: float) -> float:
+    # Bok oczka dobrany do gęstości punktów (ok. POINTS_PER_CELL na oczko), nie większy niż max_size.
+    # Dla punktów leżących na linii (zerowe pole) liczymy gęstość na długości.
+    if len(xs) == 0:
+        return max_size
+    width = float(xs.max() - xs.min())
+    height = float(ys.max() - ys.min())
+    size = max(math.sqrt(width * height * POINTS_PER_CELL / len(xs)), max(width, height) * POINTS_PER_CELL / len(xs))
+    return min(size, max_size) if size > 0 else max_size
+
+
+class GridIndex:
+    # Siatka kwadratowych oczek o boku cell_size; punkty można usuwać w O(1)
+    def __init__(self, xs: np.ndarray, ys: np.ndarray, cell_size: float, indices: Optional[np.ndarray] = None):
+        if cell_size <= 0:
+            raise ValueError("Bok oczka siatki musi być dodatni")
+        if indices is None:
+            indices = np.arange(len(xs))
+        indices = np.asarray(indices, dtype=np.int64)
+        # Współrzędne tylko punktów z indices (słowniki zamiast tablic - szybszy dostęp w pętlach,
+        # a przy wielu grupach nie kopiujemy za każdym razem całej chmury)
+        ids = indices.tolist()
+        self.xs: Dict[int, float] = dict(zip(ids, xs[indices].tolist()))
+        self.ys: Dict[int, float] = dict(zip(ids, ys[indices].tolist()))
+        self.cell_size = cell_size
+        self.cells: Dict[Tuple[int, int], Set[int]] = {}
+
+        cx = np.floor(xs[indices] / cell_size).astype(np.int64)
+        cy = np.floor(ys[indices] / cell_size).astype(np.int64)
+        for i, key in zip(ids, zip(cx.tolist(), cy.tolist())):
+            self.cells.setdefault(key, set()).add(i)
+
+    def cell_of(self, i: int) -> Tuple[int, int]:
+        return math.floor(self.xs[i] / self.cell_size), math.floor(self.ys[i] / self.cell_size)
+
+    def remove(self, i: int) -> None:
+        key = self.cell_of(i)
+        cell = self.cells.get(key)
+        if cell is not None:
+            cell.discard(i)
+            if not cell:
+                del self.cells[key]
+
+    def nearest(self, i: int, max_distance: float) -> Optional[int]:
+        # Najbliższy punkt w odległości <= max_distance (bez samego i). Przeszukujemy pierścienie oczek wokół
+        # punktu i kończymy, gdy następny pierścień jest dalej niż najlepsze trafienie albo max_distance.
+        x, y = self.xs[i], self.ys[i]
+        size = self.cell_size
+        cx, cy = self.cell_of(i)
+        # Odległość punktu od najbliższego boku własnego oczka - pierścień r leży co najmniej o edge + (r - 1) * size
+        edge = min(x - cx * size, (cx + 1) * size - x, y - cy * size, (cy + 1) * size - y)
+        reach = math.ceil(max_distance / size)
+        best, best_distance = None, max_distance * max_distance
+
+        r = 0
+        while r <= reach:
+            if r > 0:
+                ring_distance = max(edge + (r - 1) * size, 0.0)
+                # Zapas na błędy zaokrągleń - punkt dokładnie na granicy nie może wypaść
+                if ring_distance * ring_distance > best_distance * (1 + 1e-9):
+                    break
+            if 8 * r > len(self.cells):
+                # Pierścień ma więcej oczek niż zostało niepustych - taniej przejrzeć niepuste oczka
+                return self._nearest_in_cells(i, x, y, best, best_distance)
+            if r == 0:
+                keys = [(cx, cy)]
+            else:
+                keys = [(gx, gy) for gx in range(cx - r, cx + r + 1) for gy in (cy - r, cy + r)]
+                keys += [(gx, gy) for gx in (cx - r, cx + r) for gy in range(cy - r + 1, cy + r)]
+            for key in keys:
+                for j in self.cells.get(key, ()):
+                    if j == i:
+                        continue
+                    d = (self.xs[j] - x) ** 2 + (self.ys[j] - y) ** 2
+                    if d < best_distance or (d == best_distance and (best is None or j < best)):
+                        best, best_distance = j, d
+            r += 1
+        return best
+
+    def _nearest_in_cells(self, i: int, x: float, y: float, best: Optional[int], best_distance: float) -> Optional[int]:
+        size = self.cell_size
+        for (gx, gy), cell in self.cells.items():
+            dx = max(gx * size - x, x - (gx + 1) * size, 0.0)
+            dy = max(gy * size - y, y - (gy + 1) * size, 0.0)
+            if dx * dx + dy * dy > best_distance * (1 + 1e-9):
+                continue
+            for j in cell:
+                if j == i:
+                    continue
+                d = (self.xs[j] - x) ** 2 + (self.ys[j] - y) ** 2
+                if d < best_distance or (d == best_distance and (best is None or j < best)):
+                    best, best_distance = j, d
+        return best
+
+
+def chain_nearest(xs: np.ndarray, ys: np.ndarray, indices: np.ndarray, max_gap: float) -> List[List[int]]:
+    # Łączy punkty z indices w łańcuchy najbliższych sąsiadów; odstęp większy niż max_gap kończy łańcuch.
+    # Łańcuch zaczyna się od pierwszego nieużytego punktu w kolejności indices i rośnie z obu końców.
+    xs = np.asarray(xs, dtype=np.float64)
+    ys = np.asarray(ys, dtype=np.float64)
+    indices = np.asarray(indices, dtype=np.int64)
+    # Oczko dobrane do gęstości grupy; max_gap pozostaje promieniem wyszukiwania
+    index = GridIndex(xs, ys, density_cell_size(xs[indices], ys[indices], max_gap), indices)
+    used = set()
+    chains = []
+
+    for start in indices.tolist():
+        if start in used:
+            continue
+        chain = deque([start])
+        used.add(start)
+        index.remove(start)
+        for append, end in ((chain.append, lambda: chain[-1]), (chain.appendleft, lambda: chain[0])):
+            while True:
+                nxt = index.nearest(end(), max_gap)
+                if nxt is None:
+                    break
+                append(nxt)
+                used.add(nxt)
+                index.remove(nxt)
+        chains.append(list(chain))
+    return chains
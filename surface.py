@@ -0,0 +1,174 @@
+import math
+import numpy as np
+from contourpy import LineType, contour_generator
+from ezdxf.document import Drawing
+from matplotlib.tri import Triangulation
+from typing import Callable, Iterator, List, NamedTuple, Optional, Tuple
+
+from coordinates import CoordinateArrays
+
+# Powierzchnia TIN (triangulacja Delaunaya z qhull, przez matplotlib) próbkowana na regularną siatkę
+# i warstwice z siatki (contourpy). Duże zbiory liczone kafelkami: każdy kafelek triangulujemy z punktów
+# powiększonych o margines max_edge, więc trójkąty przy krawędzi kafelka są takie same jak w całym TIN.
+CONTOUR_LAYER = 'Warstwice'
+DEFAULT_CELL = 1.0          # bok oczka siatki [m]
+DEFAULT_MAX_EDGE = 50.0     # dłuższe krawędzie trójkątów pomijamy - nie interpolujemy przez luki w pomiarze
+DEFAULT_TILE_SIZE = 500.0   # bok kafelka [m]
+
+
+class SurfaceGrid(NamedTuple):
+    x0: float               # współrzędne węzła [0, 0]
+    y0: float
+    cell: float
+    z: np.ndarray           # [wiersz y, kolumna x], NaN poza TIN
+
+
+class ContourLine(NamedTuple):
+    level: float
+    vertices: np.ndarray    # (n, 2) x, y
+
+
+def triangulate(xs: np.ndarray, ys: np.ndarray, max_edge: Optional[float] = DEFAULT_MAX_EDGE) -> np.ndarray:
+    # Trójkąty (indeksy wierzchołków) bez tych, których najdłuższa krawędź przekracza max_edge
+    triangles = Triangulation(xs, ys).get_masked_triangles()
+    if max_edge is None:
+        return triangles
+    px, py = xs[triangles], ys[triangles]
+    edges = np.hypot(px - np.roll(px, 1, axis=1), py - np.roll(py, 1, axis=1))
+    return triangles[edges.max(axis=1) <= max_edge]
+
+
+def rasterize_tin(xs: np.ndarray, ys: np.ndarray, zs: np.ndarray, triangles: np.ndarray, x0: float, y0: float,
+                  cell: float, shape: Tuple[int, int]) -> np.ndarray:
+    # Interpolacja liniowa w trójkątach w węzłach siatki: każdy trójkąt obejmuje węzły ze swojego prostokąta
+    # otaczającego, z których zostawiamy te wewnątrz (współrzędne barycentryczne >= 0)
+    rows, columns = shape
+    grid = np.full(shape, np.nan)
+    px, py, pz = (xs[triangles] - x0) / cell, (ys[triangles] - y0) / cell, zs[triangles]
+
+    ix0 = np.maximum(np.ceil(px.min(axis=1)), 0).astype(np.int64)
+    ix1 = np.minimum(np.floor(px.max(axis=1)), columns - 1).astype(np.int64)
+    iy0 = np.maximum(np.ceil(py.min(axis=1)), 0).astype(np.int64)
+    iy1 = np.minimum(np.floor(py.max(axis=1)), rows - 1).astype(np.int64)
+    width = ix1 - ix0 + 1
+    counts = np.where((width > 0) & (iy1 >= iy0), width * (iy1 - iy0 + 1), 0)
+
+    det = (py[:, 1] - py[:, 2]) * (px[:, 0] - px[:, 2]) + (px[:, 2] - px[:, 1]) * (py[:, 0] - py[:, 2])
+    counts[det == 0] = 0
+    tri = np.repeat(np.arange(len(triangles)), counts)
+    local = np.arange(len(tri)) - np.repeat(np.cumsum(counts) - counts, counts)
+    gx = ix0[tri] + local % width[tri]
+    gy = iy0[tri] + local // width[tri]
+
+    dx, dy = gx - px[tri, 2], gy - py[tri, 2]
+    w0 = ((py[tri, 1] - py[tri, 2]) * dx + (px[tri, 2] - px[tri, 1]) * dy) / det[tri]
+    w1 = ((py[tri, 2] - py[tri, 0]) * dx + (px[tri, 0] - px[tri, 2]) * dy) / det[tri]
+    w2 = 1 - w0 - w1
+    eps = -1e-9
+    inside = (w0 >= eps) & (w1 >= eps) & (w2 >= eps)
+    tri, gx, gy = tri[inside], gx[inside], gy[inside]
+    grid[gy, gx] = w0[inside] * pz[tri, 0] + w1[inside] * pz[tri, 1] + w2[inside] * pz[tri, 2]
+    return grid
+
+
+def grid_surface(xs: np.ndarray, ys: np.ndarray, zs: np.ndarray, cell: float = DEFAULT_CELL,
+                 max_edge: Optional[float] = DEFAULT_MAX_EDGE,
+                 bounds: Optional[Tuple[float, float, float, float]] = None) -> SurfaceGrid:
+    # Siatka na całym zasięgu punktów (albo w bounds: xmin, ymin, xmax, ymax); węzły w wielokrotnościach cell
+    if cell <= 0:
+        raise ValueError("Bok oczka siatki musi być dodatni")
+    if bounds is None:
+        bounds = (float(xs.min()), float(ys.min()), float(xs.max()), float(ys.max()))
+    xmin, ymin, xmax, ymax = bounds
+    x0, y0 = math.floor(xmin / cell) * cell, math.floor(ymin / cell) * cell
+    # - 1e-9: krawędź kafelka leżąca na węźle nie dokłada kolejnego wiersza/kolumny przez błąd zaokrąglenia
+    shape = (int(math.ceil((ymax - y0) / cell - 1e-9)) + 1, int(math.ceil((xmax - x0) / cell - 1e-9)) + 1)
+    if len(xs) < 3:
+        return SurfaceGrid(x0, y0, cell, np.full(shape, np.nan))
+
+    # Triangulacja we współrzędnych lokalnych - duże współrzędne geodezyjne psują dokładność qhull
+    local_x, local_y = xs - x0, ys - y0
+    try:
+        triangles = triangulate(local_x, local_y, max_edge)
+    except (ValueError, RuntimeError):
+        # Punkty współliniowe albo za mało różnych punktów - brak powierzchni
+        return SurfaceGrid(x0, y0, cell, np.full(shape, np.nan))
+    return SurfaceGrid(x0, y0, cell, rasterize_tin(local_x, local_y, zs, triangles, 0.0, 0.0, cell, shape))
+
+
+def contour_levels(zmin: float, zmax: float, interval: float) -> np.ndarray:
+    if interval <= 0:
+        raise ValueError("Cięcie warstwic musi być dodatnie")
+    return np.arange(math.ceil(zmin / interval), math.floor(zmax / interval) + 1) * interval
+
+
+def trace_contours(grid: SurfaceGrid, levels: np.ndarray) -> List[ContourLine]:
+    z = np.ma.masked_invalid(grid.z)
+    if z.count() == 0:
+        return []
+    rows, columns = z.shape
+    generator = contour_generator(np.arange(columns) * grid.cell + grid.x0, np.arange(rows) * grid.cell + grid.y0, z,
+                                  line_type=LineType.Separate)
+    contours = []
+    for level in levels.tolist():
+        contours.extend(ContourLine(level, vertices) for vertices in generator.lines(level) if len(vertices) > 1)
+    return contours
+
+
+def iter_tiles(arrays: CoordinateArrays, tile_size: float, margin: float) -> Iterator[Tuple[Tuple[float, float, float, float], np.ndarray]]:
+    # Kafelki o boku tile_size z indeksami punktów kafelka powiększonego o margines (margines <= tile_size,
+    # więc wystarczą punkty z kafelka i jego ośmiu sąsiadów)
+    xs, ys = np.asarray(arrays.x), np.asarray(arrays.y)
+    x0, y0 = math.floor(xs.min() / tile_size) * tile_size, math.floor(ys.min() / tile_size) * tile_size
+    tx = ((xs - x0) // tile_size).astype(np.int64)
+    ty = ((ys - y0) // tile_size).astype(np.int64)
+    n_rows = int(ty.max()) + 1
+    keys = tx * n_rows + ty
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    occupied = np.unique(sorted_keys)
+
+    for key in occupied.tolist():
+        column, row = divmod(key, n_rows)
+        bounds = (x0 + column * tile_size, y0 + row * tile_size, x0 + (column + 1) * tile_size, y0 + (row + 1) * tile_size)
+        parts = []
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                if not 0 <= row + dy < n_rows:
+                    continue
+                neighbour = key + dx * n_rows + dy
+                lo, hi = np.searchsorted(sorted_keys, [neighbour, neighbour + 1])
+                parts.append(order[lo:hi])
+        indices = np.concatenate(parts)
+        near = ((xs[indices] >= bounds[0] - margin) & (xs[indices] <= bounds[2] + margin) &
+                (ys[indices] >= bounds[1] - margin) & (ys[indices] <= bounds[3] + margin))
+        yield bounds, indices[near]
+
+
+def add_contours(doc: Drawing, arrays: CoordinateArrays, interval: float, cell: float = DEFAULT_CELL,
+                 max_edge: float = DEFAULT_MAX_EDGE, tile_size: float = DEFAULT_TILE_SIZE, layer: str = CONTOUR_LAYER,
+                 progress: Optional[Callable[[int], None]] = None) -> int:
+    # Warstwice jako LWPOLYLINE z elevation = poziom; zwraca liczbę polilinii.
+    # Kafelki mają wspólne węzły na krawędziach, więc warstwice z sąsiednich kafelków stykają się końcami.
+    if len(arrays) < 3:
+        return 0
+    # Bok kafelka w całych oczkach - węzły na krawędziach kafelków wspólne dla sąsiadów
+    tile_size = max(round(tile_size / cell), 1) * cell
+    if max_edge > tile_size:
+        raise ValueError("Najdłuższa krawędź trójkąta nie może przekraczać boku kafelka")
+    zs = np.asarray(arrays.z, dtype=np.float64)
+    levels = contour_levels(float(zs.min()), float(zs.max()), interval)
+    msp = doc.modelspace()
+    count = done = 0
+    extent = (float(np.min(arrays.x)), float(np.min(arrays.y)), float(np.max(arrays.x)), float(np.max(arrays.y)))
+    for bounds, indices in iter_tiles(arrays, tile_size, max_edge):
+        # Kafelki brzegowe przycięte do zasięgu punktów
+        bounds = (max(bounds[0], extent[0]), max(bounds[1], extent[1]), min(bounds[2], extent[2]), min(bounds[3], extent[3]))
+        grid = grid_surface(np.asarray(arrays.x)[indices], np.asarray(arrays.y)[indices], zs[indices], cell, max_edge, bounds)
+        for level, vertices in trace_contours(grid, levels):
+            msp.add_lwpolyline(vertices.tolist(), format='xy', dxfattribs={'layer': layer, 'elevation': level})
+            count += 1
+        done += 1
+        if progress is not None:
+            progress(done)
+    return count
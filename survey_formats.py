@@ -0,0 +1,513 @@
+import codecs
+import csv
+import gzip
+import io
+import os
+import re
+import zipfile
+from contextlib import contextmanager
+from itertools import chain
+from typing import BinaryIO, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+from xml.etree.ElementTree import ParseError, iterparse
+
+# Odczyt plików z pomiarami w różnych formatach. Każdy czytnik dostaje strumień binarny (plik zwykły albo
+# rozpakowywany w locie z gzip/zip) i zwraca punkty po kolei, więc duży plik nigdy nie jest w pamięci w całości.
+# Układ jak w dotychczasowych plikach "nr Y X Z KOD": x punktu to współrzędna X (północna), y - Y (wschodnia).
+
+PointNr = Union[int, str]   # numer punktu: liczba albo identyfikator alfanumeryczny (np. P12)
+Point = Tuple[PointNr, float, float, float, str]
+MalformedLine = Tuple[int, str]  # (numer linii, treść linii)
+ColumnMap = Dict[str, Union[int, str]]  # pole punktu -> indeks kolumny albo nazwa z nagłówka
+
+FORMAT_TEXT = 'text'        # tekst rozdzielany spacjami, tabulatorami, średnikami albo przecinkami, z nagłówkiem lub bez
+FORMAT_GSI = 'gsi'          # Leica GSI-8/GSI-16
+FORMAT_LANDXML = 'landxml'  # LandXML, elementy CgPoint
+
+FIELDS = ('nr', 'y', 'x', 'z', 'code')
+DEFAULT_COLUMNS: ColumnMap = {'nr': 0, 'y': 1, 'x': 2, 'z': 3, 'code': 4}
+# Nazwy kolumn w nagłówkach CSV rozpoznawane bez podawania mapy kolumn (porównanie bez wielkości liter)
+HEADER_NAMES = {
+    'nr': ('nr', 'numer', 'id', 'punkt', 'point', 'pt', 'name', 'nazwa'),
+    'x': ('x',),
+    'y': ('y',),
+    'z': ('z', 'h', 'wys', 'wysokosc', 'wysokość', 'elevation', 'height'),
+    'code': ('kod', 'code', 'opis', 'desc', 'description'),
+}
+COMPRESSED_EXTENSIONS = ('.gz', '.zip')
+SNIFF_BYTES = 4096
+TEXT_CHUNK_SIZE = 100_000   # tyle punktów czytnik tekstu zbiera w listach kolumn przed oddaniem porcji
+# Filtr okna wyboru pliku w programach z GUI
+SURVEY_FILE_FILTER = "Pliki z pomiarem (*.txt *.csv *.gsi *.xml *.gz *.zip);;All Files (*)"
+
+
+class PointColumns(NamedTuple):
+    # Porcja punktów w listach kolumn (kolejność pól jak w Point)
+    nr: List[PointNr]
+    x: List[float]
+    y: List[float]
+    z: List[float]
+    code: List[str]
+
+
+class SurveyFormat(NamedTuple):
+    read: Callable[..., Iterator[Point]]    # (strumień binarny, columns, errors, encoding) -> punkty
+    extensions: Tuple[str, ...]
+    sniff: Optional[Callable[[bytes], bool]]  # rozpoznanie po początku pliku, gdy rozszerzenie nic nie mówi
+    # (strumień, columns, errors, encoding, chunk_size) -> porcje kolumn; bez niego kolumny składamy z punktów
+    read_columns: Optional[Callable[..., Iterator[PointColumns]]] = None
+
+
+FORMATS: Dict[str, SurveyFormat] = {}
+
+
+def register_format(name: str, read: Callable[..., Iterator[Point]], extensions: Tuple[str, ...] = (),
+                    sniff: Optional[Callable[[bytes], bool]] = None,
+                    read_columns: Optional[Callable[..., Iterator[PointColumns]]] = None) -> None:
+    FORMATS[name] = SurveyFormat(read, tuple(e.lower() for e in extensions), sniff, read_columns)
+
+
+def survey_extensions() -> Tuple[str, ...]:
+    return tuple(extension for survey_format in FORMATS.values() for extension in survey_format.extensions)
+
+
+def is_survey_file(name: str) -> bool:
+    # Plik z rozszerzeniem znanego formatu, także spakowany (.gz); archiwum zip zawsze
+    name = name.lower()
+    if name.endswith('.zip'):
+        return True
+    if name.endswith('.gz'):
+        name = name[:-3]
+    return os.path.splitext(name)[1] in survey_extensions()
+
+
+def survey_name(file_path: str) -> str:
+    # Nazwa pliku bez rozszerzeń formatu i kompresji: pomiar.txt.gz -> pomiar
+    name = os.path.basename(file_path)
+    for extension in COMPRESSED_EXTENSIONS:
+        if name.lower().endswith(extension):
+            name = name[:-len(extension)]
+            break
+    return os.path.splitext(name)[0]
+
+
+def point_nr(text: str) -> Optional[PointNr]:
+    # Numer z samych cyfr zostaje liczbą, inne identyfikatory zostają tekstem - P12 i 12 to różne punkty.
+    # Tylko cyfry ASCII: '²' czy '①' spełniają isdigit(), ale int() ich nie przyjmuje.
+    text = text.strip()
+    if not text:
+        return None
+    return int(text) if text.isascii() and text.isdigit() else text
+
+
+def nr_position(nr: PointNr) -> Optional[Tuple[str, int]]:
+    # (przedrostek, liczba końcowa): 12 -> ('', 12), 'P012' -> ('P', 12); None, gdy identyfikator nie kończy się
+    # liczbą ('BM'). Pusty przedrostek mają tylko numery liczbowe - tekst z samych cyfr zawsze jest liczbą.
+    if isinstance(nr, int):
+        return '', nr
+    match = re.match(r'(.*?)(\d+)$', nr)
+    if match is None:
+        return None
+    return match.group(1), int(match.group(2))
+
+
+def nr_sort_key(nr: PointNr) -> Tuple[str, int, str]:
+    # Numery liczbowe przed alfanumerycznymi; w obrębie przedrostka rosnąco po liczbie (P9 przed P10)
+    if isinstance(nr, int):
+        return '', nr, ''
+    position = nr_position(nr)
+    return (nr, -1, nr) if position is None else (position[0], position[1], nr)
+
+
+def follows(previous: PointNr, nr: PointNr) -> bool:
+    # nr jest kolejnym numerem po previous w tej samej serii (11 po 10, P10 po P9 albo P009)
+    if type(nr) is int:
+        return previous == nr - 1
+    position, previous_position = nr_position(nr), nr_position(previous)
+    return (position is not None and previous_position is not None and position[0] == previous_position[0]
+            and position[1] - previous_position[1] == 1)
+
+
+def parse_cells(parts: List[str]) -> Optional[Point]:
+    # Pola linii w formacie nr Y X Z KOD
+    if len(parts) < 5:
+        return None
+    nr = parts[0]
+    try:
+        return int(nr) if nr.isascii() and nr.isdigit() else nr, float(parts[2]), float(parts[1]), float(parts[3]), parts[4]
+    except ValueError:
+        pass
+    # Przecinek dziesiętny (6000,5) - sprawdzany dopiero po nieudanej próbie, żeby nie spowalniać zwykłych plików
+    try:
+        x, y, z = (float(parts[k].replace(',', '.')) for k in (2, 1, 3))
+        return int(nr) if nr.isascii() and nr.isdigit() else nr, x, y, z, parts[4]
+    except ValueError:
+        return None
+
+
+def parse_column_map(text: str) -> ColumnMap:
+    # "nr,y,x,z,code" - kolejność pól w pliku ('-' pomija kolumnę) albo "nr=Punkt,x=X,y=Y,z=H" - nazwy z nagłówka
+    columns: ColumnMap = {}
+    for k, item in enumerate(part.strip() for part in text.split(',')):
+        field, sep, name = item.partition('=')
+        field = field.strip().lower()
+        if field in ('', '-', '_'):
+            continue
+        if field not in FIELDS:
+            raise ValueError(f"Nieznane pole w mapie kolumn: {field}")
+        columns[field] = name.strip() if sep else k
+    for field in ('nr', 'x', 'y'):
+        if field not in columns:
+            raise ValueError(f"Mapa kolumn musi zawierać pole {field}")
+    return columns
+
+
+@contextmanager
+def open_survey_file(file_path: str) -> Iterator[Tuple[BinaryIO, str]]:
+    # Strumień binarny z danymi i nazwa pliku wewnątrz archiwum (do rozpoznania formatu po rozszerzeniu).
+    # gzip i zip rozpoznajemy po sygnaturze i rozpakowujemy w locie.
+    with open(file_path, 'rb') as raw:
+        magic = raw.peek(4)[:4]
+        if magic[:2] == b'\x1f\x8b':
+            name = file_path[:-3] if file_path.lower().endswith('.gz') else file_path
+            with gzip.GzipFile(fileobj=raw) as stream:
+                yield io.BufferedReader(stream), name
+            return
+        if magic == b'PK\x03\x04':
+            with zipfile.ZipFile(raw) as archive:
+                members = [info for info in archive.infolist() if not info.is_dir()]
+                if not members:
+                    raise ValueError(f"Puste archiwum {file_path}")
+                # Pierwszy plik z archiwum; zwykle kontroler pakuje jeden plik z pomiarem
+                with archive.open(members[0]) as stream:
+                    yield io.BufferedReader(stream), members[0].filename
+            return
+        yield raw, file_path
+
+
+def detect_format(name: str, head: bytes) -> str:
+    # Najpierw zawartość początku pliku (GSI i LandXML rozpoznajemy też w plikach *.txt), potem rozszerzenie;
+    # domyślnie tekst
+    for format_name, survey_format in FORMATS.items():
+        if survey_format.sniff is not None and survey_format.sniff(head):
+            return format_name
+    extension = os.path.splitext(name)[1].lower()
+    for format_name, survey_format in FORMATS.items():
+        if extension in survey_format.extensions:
+            return format_name
+    return FORMAT_TEXT
+
+
+def iter_survey_points(file_path: str, file_format: Optional[str] = None, columns: Optional[ColumnMap] = None,
+                       errors: Optional[List[MalformedLine]] = None, encoding: Optional[str] = None) -> Iterator[Point]:
+    with open_survey_file(file_path) as (stream, name):
+        yield from _survey_format(stream, name, file_format).read(stream, columns, errors, encoding)
+
+
+def iter_survey_columns(file_path: str, chunk_size: int, file_format: Optional[str] = None,
+                        columns: Optional[ColumnMap] = None, errors: Optional[List[MalformedLine]] = None,
+                        encoding: Optional[str] = None) -> Iterator[PointColumns]:
+    # Jak iter_survey_points, ale porcjami w listach kolumn (read_coordinate_arrays)
+    with open_survey_file(file_path) as (stream, name):
+        survey_format = _survey_format(stream, name, file_format)
+        if survey_format.read_columns is not None:
+            yield from survey_format.read_columns(stream, columns, errors, encoding, chunk_size)
+            return
+        chunk = []
+        for point in survey_format.read(stream, columns, errors, encoding):
+            chunk.append(point)
+            if len(chunk) >= chunk_size:
+                yield PointColumns(*map(list, zip(*chunk)))
+                chunk = []
+        if chunk:
+            yield PointColumns(*map(list, zip(*chunk)))
+
+
+def _survey_format(stream: BinaryIO, name: str, file_format: Optional[str]) -> SurveyFormat:
+    if file_format is None:
+        file_format = detect_format(name, stream.peek(SNIFF_BYTES)[:SNIFF_BYTES])
+    if file_format not in FORMATS:
+        raise ValueError(f"Nieznany format pliku: {file_format}")
+    return FORMATS[file_format]
+
+
+def _reject(errors: Optional[List[MalformedLine]], line_no: int, text: str) -> None:
+    if errors is not None:
+        errors.append((line_no, text))
+
+
+# --- tekst: spacje, tabulatory, średniki, przecinki ---
+
+DELIMITERS = (None, '\t', ';', ',')   # None - spacje (dotychczasowy format nr Y X Z KOD)
+
+
+def _split_cells(line: str, delimiter: Optional[str]) -> List[str]:
+    if delimiter is None:
+        return line.split()
+    return [cell.strip() for cell in next(csv.reader([line], delimiter=delimiter), [])]
+
+
+def _is_number(text: str, decimal_comma: bool) -> bool:
+    try:
+        float(text.replace(',', '.') if decimal_comma else text)
+    except ValueError:
+        return False
+    return True
+
+
+def _is_data_row(cells: List[str], delimiter: Optional[str], columns: ColumnMap) -> bool:
+    # Wiersz ma wszystkie kolumny z mapy, a X, Y i Z są liczbami (przy domyślnej mapie: >= 5 pól, pola 2-4 liczbowe)
+    if any(isinstance(column, str) for column in columns.values()):
+        return False
+    positions = [columns[field] for field in ('x', 'y', 'z') if field in columns]
+    return (len(cells) > max(columns.values())
+            and all(_is_number(cells[position], delimiter != ',') for position in positions))
+
+
+def _detect_delimiter(line: str, next_line: Optional[str], columns: ColumnMap) -> Optional[str]:
+    # Separator przyjmujemy tylko wtedy, gdy dzieli wiersz danych na poprawne pola - przecinki albo średniki
+    # w kodzie punktu (1 6000 5000 100 A,B,C) nie zmieniają formatu pliku rozdzielanego spacjami
+    for delimiter in DELIMITERS:
+        if _is_data_row(_split_cells(line, delimiter), delimiter, columns):
+            return delimiter
+    # Pierwszy wiersz to nagłówek albo opis - rozstrzyga następny wiersz, a gdy i ten jest błędny, sam nagłówek
+    if next_line is not None:
+        for delimiter in DELIMITERS:
+            if not _is_header(_split_cells(next_line, delimiter)):
+                return delimiter
+    for delimiter in DELIMITERS[1:]:
+        if len(_split_cells(line, delimiter)) >= 3:
+            return delimiter
+    return None
+
+
+def _is_header(cells: List[str]) -> bool:
+    # Wiersz danych ma co najmniej trzy liczby (X, Y, Z); nagłówek - mniej
+    numbers = 0
+    for cell in cells:
+        try:
+            float(cell.replace(',', '.'))
+            numbers += 1
+        except ValueError:
+            pass
+    return numbers < 3
+
+
+def _header_columns(header: List[str], columns: Optional[ColumnMap]) -> ColumnMap:
+    names = [cell.strip().lower() for cell in header]
+    if columns is None:
+        columns = {}
+        for field, aliases in HEADER_NAMES.items():
+            for alias in aliases:
+                if alias in names:
+                    columns[field] = alias
+                    break
+        for field in ('nr', 'x', 'y'):
+            if field not in columns:
+                raise ValueError(f"Nie rozpoznano kolumny {field} w nagłówku: {', '.join(header)}")
+    resolved: ColumnMap = {}
+    for field, column in columns.items():
+        if isinstance(column, str):
+            if column.lower() not in names:
+                raise ValueError(f"Brak kolumny {column} w nagłówku: {', '.join(header)}")
+            column = names.index(column.lower())
+        resolved[field] = column
+    return resolved
+
+
+def _text_rows(stream: BinaryIO, columns: Optional[ColumnMap], errors: Optional[List[MalformedLine]],
+               encoding: Optional[str]) -> Optional[Tuple[Optional[str], ColumnMap, Iterator[Tuple[int, List[str]]]]]:
+    # Separator, mapa kolumn i wiersze danych (numer linii, pola) pliku tekstowego; None dla pustego pliku
+    if encoding is None and hasattr(stream, 'peek') and stream.peek(3)[:3] == codecs.BOM_UTF8:
+        # UTF-8 z sygnaturą (Notatnik, eksport z Excela)
+        encoding = 'utf-8-sig'
+    lines = enumerate(io.TextIOWrapper(stream, encoding=encoding, newline=''), start=1)
+    for line_no, line in lines:
+        if line_no == 1:
+            # BOM przy jawnie podanym kodowaniu 'utf-8' nie może trafić do nagłówka ani numeru punktu
+            line = line.lstrip('\ufeff')
+        if line.strip():
+            break
+    else:
+        return None
+    # Następny niepusty wiersz do rozpoznania separatora, gdy pierwszy jest nagłówkiem; przeczytane linie wracają do strumienia
+    ahead = []
+    for ahead_no, ahead_line in lines:
+        ahead.append((ahead_no, ahead_line))
+        if ahead_line.strip():
+            break
+    lines = chain(ahead, lines)
+    delimiter = _detect_delimiter(line, ahead[-1][1] if ahead and ahead[-1][1].strip() else None,
+                                  columns or DEFAULT_COLUMNS)
+    if delimiter is None:
+        rows = ((line_no, line.split()) for line_no, line in chain([(line_no, line)], lines))
+    else:
+        first_no = line_no
+        reader = csv.reader(chain([line], (line for _, line in lines)), delimiter=delimiter)
+        rows = ((first_no + reader.line_num - 1, [cell.strip() for cell in row]) for row in reader)
+
+    # Pierwszy wiersz: nagłówek (kolumny po nazwach) albo już dane (kolumny po kolejności)
+    line_no, header = next(rows)
+    mapping = dict(columns or DEFAULT_COLUMNS)
+    if _is_header(header):
+        try:
+            mapping = _header_columns(header, columns)
+        except ValueError:
+            if columns is not None:
+                raise
+            # Nierozpoznany opis na początku pliku - błędna linia jak w dotychczasowym formacie
+            _reject(errors, line_no, (delimiter or ' ').join(header))
+    elif any(isinstance(column, str) for column in mapping.values()):
+        raise ValueError("Mapa kolumn z nazwami wymaga pliku z nagłówkiem")
+    else:
+        rows = chain([(line_no, header)], rows)
+    return delimiter, mapping, rows
+
+
+def read_text_columns(stream: BinaryIO, columns: Optional[ColumnMap] = None, errors: Optional[List[MalformedLine]] = None,
+                      encoding: Optional[str] = None, chunk_size: int = TEXT_CHUNK_SIZE) -> Iterator[PointColumns]:
+    # Punkty od razu w listach kolumn, porcjami po chunk_size - bez krotki na każdy punkt
+    parsed = _text_rows(stream, columns, errors, encoding)
+    if parsed is None:
+        return
+    delimiter, mapping, rows = parsed
+    nrs, xs, ys, zs, codes = [], [], [], [], []
+
+    if delimiter is None and mapping == DEFAULT_COLUMNS:
+        # Dotychczasowy format nr Y X Z KOD - szybka ścieżka
+        for line_no, cells in rows:
+            if not cells:
+                continue
+            try:
+                nr = cells[0]
+                x, y, z = float(cells[2]), float(cells[1]), float(cells[3])
+                nr = int(nr) if nr.isascii() and nr.isdigit() else nr
+                code = cells[4]
+            except (IndexError, ValueError):
+                # Przecinek dziesiętny albo błędna linia
+                point = parse_cells(cells)
+                if point is None:
+                    _reject(errors, line_no, ' '.join(cells))
+                    continue
+                nr, x, y, z, code = point
+            nrs.append(nr)
+            xs.append(x)
+            ys.append(y)
+            zs.append(z)
+            codes.append(code)
+            if len(nrs) >= chunk_size:
+                yield PointColumns(nrs, xs, ys, zs, codes)
+                nrs, xs, ys, zs, codes = [], [], [], [], []
+        if nrs:
+            yield PointColumns(nrs, xs, ys, zs, codes)
+        return
+
+    # Przecinek dziesiętny dopuszczamy, gdy przecinek nie rozdziela kolumn
+    decimal_comma = delimiter != ','
+    nr_col, x_col, y_col = mapping['nr'], mapping['x'], mapping['y']
+    z_col, code_col = mapping.get('z'), mapping.get('code')
+    for line_no, cells in rows:
+        if not any(cells):
+            continue
+        try:
+            nr = point_nr(cells[nr_col])
+            values = [cells[x_col], cells[y_col], cells[z_col] if z_col is not None else '0']
+            if decimal_comma:
+                values = [value.replace(',', '.') for value in values]
+            x, y, z = (float(value) for value in values)
+            code = cells[code_col] if code_col is not None and code_col < len(cells) else ''
+        except (IndexError, ValueError):
+            nr = None
+        if nr is None:
+            _reject(errors, line_no, (delimiter or ' ').join(cells))
+            continue
+        nrs.append(nr)
+        xs.append(x)
+        ys.append(y)
+        zs.append(z)
+        codes.append(code)
+        if len(nrs) >= chunk_size:
+            yield PointColumns(nrs, xs, ys, zs, codes)
+            nrs, xs, ys, zs, codes = [], [], [], [], []
+    if nrs:
+        yield PointColumns(nrs, xs, ys, zs, codes)
+
+
+def read_text(stream: BinaryIO, columns: Optional[ColumnMap] = None, errors: Optional[List[MalformedLine]] = None,
+              encoding: Optional[str] = None) -> Iterator[Point]:
+    for chunk in read_text_columns(stream, columns, errors, encoding):
+        yield from zip(*chunk)
+
+
+# --- Leica GSI-8 / GSI-16 ---
+
+# Jednostki współrzędnych (ostatni znak informacji słowa): mnożnik do metrów
+GSI_UNITS = {'0': 1e-3, '1': 1e-3 * 0.3048, '6': 1e-4, '7': 1e-4 * 0.3048, '8': 1e-5}
+GSI_SNIFF = re.compile(rb'\s*\*?(11|41)[\d.]{4}[+-]')
+
+
+def _gsi_value(word: str) -> float:
+    value = int(word[7:]) * GSI_UNITS.get(word[5], 1e-3)
+    return -value if word[6] == '-' else value
+
+
+def read_gsi(stream: BinaryIO, columns: Optional[ColumnMap] = None, errors: Optional[List[MalformedLine]] = None,
+             encoding: Optional[str] = None) -> Iterator[Point]:
+    # Słowa: 2 cyfry WI, 4 znaki informacji, znak, dane (8 albo 16 znaków; GSI-16 zaczyna blok od '*').
+    # WI 11 - numer punktu, 81 - Easting (y), 82 - Northing (x), 83 - wysokość, 71 - kod.
+    # Bloki bez współrzędnych (pomiary kątów i odległości, bloki kodu 41) pomijamy bez zgłaszania błędu.
+    for line_no, line in enumerate(io.TextIOWrapper(stream, encoding=encoding or 'ascii', errors='replace'), start=1):
+        words = {word[:2]: word for word in line.replace('*', ' ').split() if len(word) > 7}
+        if '81' not in words and '82' not in words:
+            continue
+        try:
+            nr = point_nr(words['11'][7:].lstrip('0') or '0')
+            z = _gsi_value(words['83']) if '83' in words else 0.0
+            code = words['71'][7:].lstrip('0') if '71' in words else ''
+            yield nr, _gsi_value(words['82']), _gsi_value(words['81']), z, code
+        except (KeyError, ValueError):
+            _reject(errors, line_no, line.strip())
+
+
+# --- LandXML ---
+
+def read_landxml(stream: BinaryIO, columns: Optional[ColumnMap] = None, errors: Optional[List[MalformedLine]] = None,
+                 encoding: Optional[str] = None) -> Iterator[Point]:
+    # CgPoint: name, code/desc w atrybutach, "northing easting [elevation]" w treści. Przetworzone elementy
+    # usuwamy z drzewa, więc pamięć nie rośnie z liczbą punktów. Numer "linii" w błędach to numer punktu w pliku.
+    container = None
+    count = 0
+    try:
+        for event, element in iterparse(stream, events=('start', 'end')):
+            tag = element.tag.rpartition('}')[2]
+            if event == 'start':
+                if tag == 'CgPoints':
+                    container = element
+                continue
+            if tag != 'CgPoint':
+                continue
+            count += 1
+            name = element.get('name') or element.get('oID') or ''
+            values = (element.text or '').split()
+            try:
+                nr = point_nr(name)
+                if nr is None or len(values) < 2:
+                    raise ValueError(name)
+                z = float(values[2]) if len(values) > 2 else 0.0
+                point = nr, float(values[0]), float(values[1]), z, element.get('code') or element.get('desc') or ''
+            except ValueError:
+                point = None
+                # Punkty z pntRef (odwołanie do innego punktu) nie mają własnych współrzędnych
+                if not element.get('pntRef'):
+                    _reject(errors, count, f"{name} {' '.join(values)}".strip())
+            element.clear()
+            if container is not None:
+                container.clear()
+            if point is not None:
+                yield point
+    except ParseError as e:
+        raise ValueError(f"Niepoprawny plik LandXML: {e}") from None
+
+
+register_format(FORMAT_TEXT, read_text, ('.txt', '.csv'), read_columns=read_text_columns)
+register_format(FORMAT_GSI, read_gsi, ('.gsi',), lambda head: GSI_SNIFF.match(head) is not None)
+register_format(FORMAT_LANDXML, read_landxml, ('.xml', '.landxml'), lambda head: b'<LandXML' in head)
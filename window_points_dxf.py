@@ -1,13 +1,16 @@
+from PySide6.QtCore import QThreadPool
 from PySide6.QtGui import QCloseEvent
-from ezdxf import new as new_dxf
-from ezdxf.document import Drawing
-from typing import List, Tuple
-from PySide6.QtWidgets import QApplication, QWidget, QPushButton, QMessageBox, QLineEdit, QFileDialog, QLabel
+from point_labels import LABEL_TEXT, LABEL_BLOCK, LABEL_MTEXT, LABEL_NONE
+from dxf_worker import DxfWorker
+from instrumentation import Instrumentation, append_log, profile_path_for
+from survey_formats import SURVEY_FILE_FILTER
+from PySide6.QtWidgets import QApplication, QWidget, QPushButton, QMessageBox, QLineEdit, QFileDialog, QLabel, QComboBox, QProgressBar, QPlainTextEdit
 
 
 class LoginWindow(QWidget):
     def __init__(self):
         super().__init__()
+        self.worker = None
         self.setup()
 
 
@@ -21,9 +24,35 @@ class LoginWindow(QWidget):
         choose_file_btn = QPushButton("Wybierz plik", self)
         choose_file_btn.move(50, 150)
         choose_file_btn.clicked.connect(self.choose_file)
-        create_dxf = QPushButton("Stwórz dxf z punktami", self)
-        create_dxf.move(150, 150)
-        create_dxf.clicked.connect(self.generate_dxf_file)
+        self.create_dxf = QPushButton("Stwórz dxf z punktami", self)
+        self.create_dxf.move(150, 150)
+        self.create_dxf.clicked.connect(self.generate_dxf_file)
+        label_mode_label = QLabel("Opisy punktów:", self)
+        label_mode_label.move(25, 193)
+        self.label_mode = QComboBox(self)
+        self.label_mode.addItem("Teksty (numer i kod)", LABEL_TEXT)
+        self.label_mode.addItem("Blok z atrybutami", LABEL_BLOCK)
+        self.label_mode.addItem("Jeden MTEXT", LABEL_MTEXT)
+        self.label_mode.addItem("Bez opisów", LABEL_NONE)
+        self.label_mode.move(120, 190)
+        self.progress_bar = QProgressBar(self)
+        self.progress_bar.setFixedWidth(250)
+        self.progress_bar.move(25, 230)
+        self.progress_bar.hide()
+        self.cancel_btn = QPushButton("Anuluj", self)
+        self.cancel_btn.move(25, 270)
+        self.cancel_btn.clicked.connect(self.cancel_generation)
+        self.cancel_btn.hide()
+        self.details_btn = QPushButton("Szczegóły", self)
+        self.details_btn.move(120, 270)
+        self.details_btn.clicked.connect(self.toggle_details)
+        self.details_btn.setEnabled(False)
+        # Czasy etapów i liczniki ostatniego przebiegu, rozwijane pod oknem
+        self.details = QPlainTextEdit(self)
+        self.details.setReadOnly(True)
+        self.details.setFixedSize(250, 180)
+        self.details.move(25, 305)
+        self.details.hide()
         quit_btn = QPushButton("Wyjście", self)
         quit_btn.move(220, 270)
         quit_btn.clicked.connect(QApplication.instance().quit)
@@ -35,39 +64,101 @@ class LoginWindow(QWidget):
     def choose_file(self):
         options = QFileDialog.Options()
         options |= QFileDialog.DontUseNativeDialog
-        file_name, _ = QFileDialog.getOpenFileName(self, "Wybierz plik txt", "", "Text Files (*.txt);;All Files (*)", options=options)
+        file_name, _ = QFileDialog.getOpenFileName(self, "Wybierz plik z pomiarem", "", SURVEY_FILE_FILTER, options=options)
         if file_name:
             self.file_choice.setText(file_name)
 
 
-    def read_coordinates(self, file_path: str) -> List[Tuple[int, float, float, float, str]]:
-        measurements = []
-        with open(file_path) as stream:
-            content = stream.read()
-            cleaned_lines = ["\t".join(line.split()) for line in content.split('\n')]
-            measurements.extend(cleaned_lines)
-        return [(int(''.join(filter(str.isdigit, line.split('\t')[0]))),
-                float(line.split('\t')[2]),
-                float(line.split('\t')[1]),
-                float(line.split('\t')[3]),
-                str(line.split('\t')[4])) for line in measurements if len(line) > 3]
-
-
     def generate_dxf_file(self):
         file_path = self.file_choice.text()
         if file_path == '- plik txt -':
             QMessageBox.warning(self, "Błąd", "Proszę wybrać plik!")
             return
-        try:
-            points = self.read_coordinates(file_path)
-            if not points:
-                QMessageBox.warning(self, "Błąd", "Brak punktów do zapisania!")
-                return
+        if self.worker is not None:
+            return
+
+        # Ustawienia czytamy w wątku GUI, wątek roboczy dostaje tylko gotowe wartości
+        label_mode = self.label_mode.currentData()
+
+        instrumentation = Instrumentation('points', file_path, profile_path_for('window_points_dxf'))
+
+        def job(progress):
+            # ezdxf i numpy ładujemy dopiero przy pierwszym uruchomieniu, w wątku roboczym - okno startuje szybciej
+            with instrumentation.stage('import'):
+                from ezdxf import new as new_dxf
+                from coordinate_cache import read_coordinates_cached
+                from create_points import create_points
+            errors = []
+            with instrumentation.stage('read_coordinates'):
+                points = read_coordinates_cached(file_path, errors)
+            instrumentation.count('lines_parsed', len(points) + len(errors))
+            instrumentation.count('rejected_lines', len(errors))
+            progress(0, len(points))
             doc = new_dxf(dxfversion='R2010')  # Upewniamy się, że obiekt doc to Drawing
-            self.create_points(points, doc)
+            with instrumentation.stage('create_points'):
+                create_points(points, doc, label_mode=label_mode, progress=lambda done: progress(done, len(points)))
+            return doc, len(points), errors, instrumentation
+
+        self.worker = DxfWorker(job)
+        self.worker.signals.progress.connect(self.show_progress)
+        self.worker.signals.finished.connect(self.save_dxf_file)
+        self.worker.signals.failed.connect(self.generation_failed)
+        self.worker.signals.cancelled.connect(self.generation_cancelled)
+        self.set_running(True)
+        QThreadPool.globalInstance().start(self.worker)
+
+
+    def set_running(self, running: bool) -> None:
+        self.create_dxf.setEnabled(not running)
+        self.progress_bar.setVisible(running)
+        self.cancel_btn.setVisible(running)
+        self.cancel_btn.setEnabled(running)
+        # Zakres 0-0 to pasek "zajęty" na czas wczytywania pliku
+        self.progress_bar.setRange(0, 0)
+        if not running:
+            self.worker = None
+
+
+    def show_progress(self, done: int, total: int) -> None:
+        self.progress_bar.setRange(0, max(total, 1))
+        self.progress_bar.setValue(done)
+        self.progress_bar.setFormat(f"{done} / {total} punktów")
+
+
+    def cancel_generation(self):
+        if self.worker is not None:
+            self.worker.cancel()
+            self.cancel_btn.setEnabled(False)
+
+
+    def generation_cancelled(self):
+        self.set_running(False)
+        QMessageBox.information(self, "Anulowano", "Tworzenie pliku DXF zostało anulowane.")
+
+
+    def generation_failed(self, message: str):
+        self.set_running(False)
+        QMessageBox.critical(self, "Błąd", f"Wystąpił błąd: {message}")
+
+
+    def save_dxf_file(self, result):
+        self.set_running(False)
+        doc, points_count, errors, instrumentation = result
+        if not points_count:
+            QMessageBox.warning(self, "Błąd", "Brak punktów do zapisania!")
+            return
+        if errors:
+            from coordinates import format_malformed_lines
+            QMessageBox.warning(self, "Niepoprawne linie",
+                                f"Pominięto {len(errors)} niepoprawnych linii:\n{format_malformed_lines(errors)}")
+        try:
             save_path, _ = QFileDialog.getSaveFileName(self, "Zapisz plik DXF", "", "DXF Files (*.dxf)")
             if save_path:
-                doc.saveas(save_path)
+                with instrumentation.stage('saveas'):
+                    doc.saveas(save_path)
+                instrumentation.count_entities(doc)
+                instrumentation.count_file(save_path)
+                self.show_details(instrumentation)
                 QMessageBox.information(self, "Sukces", "Plik DXF został pomyślnie zapisany!")
             else:
                 QMessageBox.warning(self, "Błąd", "Nie zapisano pliku.")
@@ -75,19 +166,28 @@ class LoginWindow(QWidget):
             QMessageBox.critical(self, "Błąd", f"Wystąpił błąd: {e}")
 
 
-    def create_points(self, points: List[Tuple[int, float, float, float, str]], doc: Drawing) -> None:
-        msp = doc.modelspace()  # Używamy doc.modelspace() prawidłowo
-        sorted_points = sorted(points, key=lambda x: x[0])  # Sortujemy punkty po numerze
-        for nr, x, y, z, desc in sorted_points:
-            msp.add_point(location=(x, y, z), dxfattribs={'layer': 'POINTS'})
-            msp.add_text(f'{nr}', dxfattribs={'insert': (x-0.4, y+0.1, z + 0.2), 'style': 'Standard', 'height': 0.1})
-            msp.add_text(desc, dxfattribs={'insert': (x+0.1, y+0.1, z + 0.2), 'style': 'Standard', 'height': 0.1})
+    def show_details(self, instrumentation: Instrumentation) -> None:
+        instrumentation.finish()
+        try:
+            append_log(instrumentation.to_dict())
+        except OSError:
+            # Dziennik jest pomocniczy - brak zapisu nie może przerwać pracy
+            pass
+        self.details.setPlainText(instrumentation.summary())
+        self.details_btn.setEnabled(True)
+
+
+    def toggle_details(self):
+        visible = not self.details.isVisible()
+        self.details.setVisible(visible)
+        self.setFixedSize(300, 500 if visible else 300)
 
 
     def closeEvent(self, event: QCloseEvent):
         should_close = QMessageBox.question(self, "Zamknięcie aplikacji", "Czy na pewno chcesz zamknąć?",
                                             QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
         if should_close == QMessageBox.StandardButton.Yes:
+            self.cancel_generation()
             event.accept()
         else:
             event.ignore()
@@ -10,7 +10,15 @@ a = Analysis(
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    excludes=[
+        # Okno używa tylko QtCore, QtGui i QtWidgets oraz ezdxf z numpy - reszta niepotrzebnie wydłuża rozpakowanie
+        'tkinter', 'matplotlib', 'contourpy', 'PIL', 'lxml', 'scipy', 'pandas', 'IPython', 'pytest', 'setuptools',
+        'pkg_resources', 'pydoc', 'xmlrpc', 'email.mime',
+        'PySide6.QtNetwork', 'PySide6.QtQml', 'PySide6.QtQuick', 'PySide6.QtQuickWidgets', 'PySide6.QtOpenGL',
+        'PySide6.QtOpenGLWidgets', 'PySide6.QtPdf', 'PySide6.QtPdfWidgets', 'PySide6.QtSvg', 'PySide6.QtSvgWidgets',
+        'PySide6.QtDBus', 'PySide6.QtPrintSupport', 'PySide6.QtSql', 'PySide6.QtTest', 'PySide6.QtXml',
+        'PySide6.QtConcurrent', 'PySide6.QtMultimedia', 'PySide6.QtWebEngineCore', 'PySide6.QtWebEngineWidgets',
+    ],
     noarchive=False,
 )
 pyz = PYZ(a.pure)
@@ -25,7 +33,7 @@ exe = EXE(
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
-    upx=True,
+    upx=False,  # rozpakowywanie bibliotek skompresowanych UPX spowalnia każde uruchomienie
     upx_exclude=[],
     runtime_tmpdir=None,
     console=True,
@@ -0,0 +1,52 @@
+# -*- mode: python ; coding: utf-8 -*-
+
+
+a = Analysis(
+    ['window_points_dxf.py'],
+    pathex=[],
+    binaries=[],
+    datas=[],
+    hiddenimports=[],
+    hookspath=[],
+    hooksconfig={},
+    runtime_hooks=[],
+    excludes=[
+        # Okno używa tylko QtCore, QtGui i QtWidgets oraz ezdxf z numpy - reszta niepotrzebnie wydłuża rozpakowanie
+        'tkinter', 'matplotlib', 'contourpy', 'PIL', 'lxml', 'scipy', 'pandas', 'IPython', 'pytest', 'setuptools',
+        'pkg_resources', 'pydoc', 'xmlrpc', 'email.mime',
+        'PySide6.QtNetwork', 'PySide6.QtQml', 'PySide6.QtQuick', 'PySide6.QtQuickWidgets', 'PySide6.QtOpenGL',
+        'PySide6.QtOpenGLWidgets', 'PySide6.QtPdf', 'PySide6.QtPdfWidgets', 'PySide6.QtSvg', 'PySide6.QtSvgWidgets',
+        'PySide6.QtDBus', 'PySide6.QtPrintSupport', 'PySide6.QtSql', 'PySide6.QtTest', 'PySide6.QtXml',
+        'PySide6.QtConcurrent', 'PySide6.QtMultimedia', 'PySide6.QtWebEngineCore', 'PySide6.QtWebEngineWidgets',
+    ],
+    noarchive=False,
+)
+pyz = PYZ(a.pure)
+
+# Wariant jednokatalogowy: exe obok bibliotek, bez rozpakowywania do katalogu tymczasowego przy każdym starcie
+exe = EXE(
+    pyz,
+    a.scripts,
+    [],
+    exclude_binaries=True,
+    name='window_points_dxf',
+    debug=False,
+    bootloader_ignore_signals=False,
+    strip=False,
+    upx=False,
+    console=True,
+    disable_windowed_traceback=False,
+    argv_emulation=False,
+    target_arch=None,
+    codesign_identity=None,
+    entitlements_file=None,
+)
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    strip=False,
+    upx=False,
+    upx_exclude=[],
+    name='window_points_dxf',
+)
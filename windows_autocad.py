@@ -1,14 +1,23 @@
 import math
-from typing import List, Tuple
+from typing import List, Optional, Tuple
+from PySide6.QtCore import QThreadPool
 from PySide6.QtGui import QCloseEvent
-from PySide6.QtWidgets import QApplication, QWidget, QPushButton, QMessageBox, QLineEdit, QFileDialog
+from PySide6.QtWidgets import QApplication, QWidget, QPushButton, QMessageBox, QLineEdit, QFileDialog, QProgressBar, QPlainTextEdit
+from ezdxf.filemanagement import new
 from connect_points import connect_points_with_lwpolyline
-from create_profiles import read_coordinates
+from coordinates import format_malformed_lines
+from coordinate_cache import read_coordinates_cached
+from create_profiles import create_profiles as create_profiles_drawing
+from dxf_worker import DxfWorker, Job
+from instrumentation import Instrumentation, append_log, profile_path_for
+from survey_formats import SURVEY_FILE_FILTER
 
 class LoginWindow(QWidget):
     def __init__(self):
         super().__init__()
 
+        self.worker = None
+        self.output_dxf_path = None
         self.setup()
 
     def setup(self):
@@ -20,13 +29,35 @@ class LoginWindow(QWidget):
         choose_file_btn.move(110, 50)
         choose_file_btn.clicked.connect(self.choose_file)
 
-        connect_points = QPushButton("Połącz punkty o tym samym kodzie ", self)
-        connect_points.move(20, 150)
-        connect_points.clicked.connect(self.connect_points)
+        self.connect_points_btn = QPushButton("Połącz punkty o tym samym kodzie ", self)
+        self.connect_points_btn.move(20, 150)
+        self.connect_points_btn.clicked.connect(self.connect_points)
 
-        create_profiles = QPushButton("Utwórz profile ", self)
-        create_profiles.move(20, 180)
-        create_profiles.clicked.connect(self.create_profiles)
+        self.create_profiles_btn = QPushButton("Utwórz profile ", self)
+        self.create_profiles_btn.move(20, 180)
+        self.create_profiles_btn.clicked.connect(self.create_profiles)
+
+        self.progress_bar = QProgressBar(self)
+        self.progress_bar.setFixedWidth(260)
+        self.progress_bar.move(20, 225)
+        self.progress_bar.hide()
+
+        self.cancel_btn = QPushButton("Anuluj", self)
+        self.cancel_btn.move(20, 270)
+        self.cancel_btn.clicked.connect(self.cancel_conversion)
+        self.cancel_btn.hide()
+
+        self.details_btn = QPushButton("Szczegóły", self)
+        self.details_btn.move(120, 270)
+        self.details_btn.clicked.connect(self.toggle_details)
+        self.details_btn.setEnabled(False)
+
+        # Czasy etapów i liczniki ostatniego przebiegu, rozwijane pod oknem
+        self.details = QPlainTextEdit(self)
+        self.details.setReadOnly(True)
+        self.details.setFixedSize(260, 180)
+        self.details.move(20, 305)
+        self.details.hide()
 
         quit_btn = QPushButton("Wyjście", self)
         quit_btn.move(220, 270)
@@ -40,50 +71,145 @@ class LoginWindow(QWidget):
     def choose_file(self):
         options = QFileDialog.Options()
         options |= QFileDialog.DontUseNativeDialog
-        file_name, _ = QFileDialog.getOpenFileName(self, "Wybierz plik txt", "", "Text Files (*.txt);;All Files (*)", options=options)
+        file_name, _ = QFileDialog.getOpenFileName(self, "Wybierz plik z pomiarem", "", SURVEY_FILE_FILTER, options=options)
         if file_name:
             self.file_choice.setText(file_name)
 
-    def connect_points(self):
-        input_file_path = self.file_choice.text()
+    def ask_paths(self) -> Optional[Tuple[str, str]]:
+        input_file_path = self.file_choice.text().strip()
         if input_file_path == '- plik txt -':
             QMessageBox.warning(self, "Brak pliku", "Proszę wybrać plik tekstowy przed utworzeniem pliku dxf.")
+            return None
+        if self.worker is not None:
+            return None
+
+        options = QFileDialog.Options()
+        options |= QFileDialog.DontUseNativeDialog
+        output_dxf_path, _ = QFileDialog.getSaveFileName(self, "Zapisz jako DXF", "", "DXF Files (*.dxf)", options=options)
+        if not output_dxf_path:
+            return None
+        return input_file_path, output_dxf_path
+
+    def connect_points(self):
+        paths = self.ask_paths()
+        if paths is None:
             return
-        
-        try:
-            points = read_coordinates(input_file_path)
-            options = QFileDialog.Options()
-            options |= QFileDialog.DontUseNativeDialog
-            output_dxf_path, _ = QFileDialog.getSaveFileName(self, "Zapisz jako DXF", "", "DXF Files (*.dxf)", options=options)
-            if output_dxf_path:
-                # Tutaj możesz wywołać funkcję tworzenia pliku DXF z punktami
-                # create_dxf_file(points, output_dxf_path, ...)
-                QMessageBox.information(self, "Konwersja zakończona", f"Plik DXF został zapisany jako {output_dxf_path}.")
-        except Exception as e:
-            QMessageBox.critical(self, "Błąd konwersji", f"Wystąpił błąd podczas konwersji pliku: {str(e)}")
+        input_file_path, output_dxf_path = paths
+
+        instrumentation = Instrumentation('connect', input_file_path, profile_path_for('windows_autocad'))
+
+        def job(progress):
+            errors = []
+            with instrumentation.stage('read_coordinates'):
+                points = read_coordinates_cached(input_file_path, errors)
+            instrumentation.count('lines_parsed', len(points) + len(errors))
+            instrumentation.count('rejected_lines', len(errors))
+            progress(0, len(points))
+            doc = new()
+            with instrumentation.stage('connect'):
+                connect_points_with_lwpolyline(points, doc, progress=lambda done: progress(done, len(points)))
+            return doc, errors, instrumentation
+
+        self.start_conversion(job, output_dxf_path)
 
     def create_profiles(self):
-        input_file_path = self.file_choice.text()
-        if input_file_path == '- plik txt -':
-            QMessageBox.warning(self, "Brak pliku", "Proszę wybrać plik tekstowy przed utworzeniem pliku dxf.")
+        paths = self.ask_paths()
+        if paths is None:
             return
-        
+        input_file_path, output_dxf_path = paths
+
+        instrumentation = Instrumentation('profiles', input_file_path, profile_path_for('windows_autocad'))
+
+        def job(progress):
+            errors = []
+            with instrumentation.stage('read_coordinates'):
+                points = read_coordinates_cached(input_file_path, errors)
+            instrumentation.count('lines_parsed', len(points) + len(errors))
+            instrumentation.count('rejected_lines', len(errors))
+            # Punkty przechodzą przez widok w planie i przez profil
+            total = 2 * len(points)
+            progress(0, total)
+            with instrumentation.stage('profiles'):
+                doc = create_profiles_drawing(points, progress=lambda done: progress(done, total))
+            return doc, errors, instrumentation
+
+        self.start_conversion(job, output_dxf_path)
+
+    def start_conversion(self, job: Job, output_dxf_path: str) -> None:
+        # Sloty muszą być metodami okna, żeby Qt wywołał je w wątku GUI
+        self.output_dxf_path = output_dxf_path
+        self.worker = DxfWorker(job)
+        self.worker.signals.progress.connect(self.show_progress)
+        self.worker.signals.finished.connect(self.save_conversion)
+        self.worker.signals.failed.connect(self.conversion_failed)
+        self.worker.signals.cancelled.connect(self.conversion_cancelled)
+        self.set_running(True)
+        QThreadPool.globalInstance().start(self.worker)
+
+    def set_running(self, running: bool) -> None:
+        self.connect_points_btn.setEnabled(not running)
+        self.create_profiles_btn.setEnabled(not running)
+        self.progress_bar.setVisible(running)
+        self.progress_bar.setRange(0, 0)
+        self.cancel_btn.setVisible(running)
+        self.cancel_btn.setEnabled(running)
+        if not running:
+            self.worker = None
+
+    def show_progress(self, done: int, total: int) -> None:
+        self.progress_bar.setRange(0, max(total, 1))
+        self.progress_bar.setValue(done)
+
+    def cancel_conversion(self):
+        if self.worker is not None:
+            self.worker.cancel()
+            self.cancel_btn.setEnabled(False)
+
+    def conversion_cancelled(self):
+        self.set_running(False)
+        QMessageBox.information(self, "Anulowano", "Konwersja została anulowana.")
+
+    def conversion_failed(self, message: str):
+        self.set_running(False)
+        QMessageBox.critical(self, "Błąd konwersji", f"Wystąpił błąd podczas konwersji pliku: {message}")
+
+    def save_conversion(self, result):
+        self.set_running(False)
+        output_dxf_path = self.output_dxf_path
+        doc, errors, instrumentation = result
+        if errors:
+            QMessageBox.warning(self, "Niepoprawne linie",
+                                f"Pominięto {len(errors)} niepoprawnych linii:\n{format_malformed_lines(errors)}")
         try:
-            points = read_coordinates(input_file_path)
-            options = QFileDialog.Options()
-            options |= QFileDialog.DontUseNativeDialog
-            output_dxf_path, _ = QFileDialog.getSaveFileName(self, "Zapisz jako DXF", "", "DXF Files (*.dxf)", options=options)
-            if output_dxf_path:
-                # Tutaj możesz wywołać funkcję tworzenia pliku DXF z punktami
-                # create_dxf_file(points, output_dxf_path, ...)
-                QMessageBox.information(self, "Konwersja zakończona", f"Plik DXF został zapisany jako {output_dxf_path}.")
+            with instrumentation.stage('saveas'):
+                doc.saveas(output_dxf_path)
+            instrumentation.count_entities(doc)
+            instrumentation.count_file(output_dxf_path)
+            self.show_details(instrumentation)
+            QMessageBox.information(self, "Konwersja zakończona", f"Plik DXF został zapisany jako {output_dxf_path}.")
         except Exception as e:
             QMessageBox.critical(self, "Błąd konwersji", f"Wystąpił błąd podczas konwersji pliku: {str(e)}")
 
+    def show_details(self, instrumentation: Instrumentation) -> None:
+        instrumentation.finish()
+        try:
+            append_log(instrumentation.to_dict())
+        except OSError:
+            # Dziennik jest pomocniczy - brak zapisu nie może przerwać pracy
+            pass
+        self.details.setPlainText(instrumentation.summary())
+        self.details_btn.setEnabled(True)
+
+    def toggle_details(self):
+        visible = not self.details.isVisible()
+        self.details.setVisible(visible)
+        self.setFixedSize(300, 500 if visible else 300)
+
     def closeEvent(self, event: QCloseEvent):
         should_close = QMessageBox.question(self, "Zamknięcie aplikacji",  "Czy na pewno chcesz zamknąć?",
                                             QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
         if should_close == QMessageBox.StandardButton.Yes:
+            self.cancel_conversion()
             event.accept()
         else:
             event.ignore()